@@ -0,0 +1,166 @@
+"""
+accounts.py is the shared account directory (id -> name / email / username) for all tools.
+
+Tools used to build a throwaway user_map from the references.accounts of each response, and the logins tool pulled
+/api/account?limit=500 on every question. The directory pages through /api/account once (refreshing after ACCOUNT_TTL),
+and every tool that sees a references blob merges it in with merge_references(), so names resolved by one tool are free
+for the others.
+
+The methods:
+
+merge_references(references):
+    adds the accounts of a response's "references" blob to the directory.
+
+display_name(account_id, default):
+    the name to show for an account. Uses what is already known and only loads / refreshes the directory on a miss.
+
+find_account(identifier):
+    O(1) lookup by id or by lowercased email, username or name.
+
+get_account_directory():
+    the process wide AccountDirectory, for all() / get(id).
+"""
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from backend.opsready import BASE_URL, api_get
+from backend.timestamps import normalize_record
+
+ACCOUNT_TTL = int(os.getenv("OPSREADY_ACCOUNT_TTL", 10 * 60))
+MISS_REFRESH_INTERVAL = int(os.getenv("OPSREADY_ACCOUNT_MISS_REFRESH", 60))
+PAGE_SIZE = 500
+LOOKUP_KEYS = ("email", "username", "name")
+
+
+class AccountDirectory:
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_key: Dict[str, str] = {}
+        self._loaded_at = 0.0
+        self._refreshed_at = 0.0
+
+    def _add(self, account_id: str, account: Dict[str, Any]) -> None:
+        existing = self._by_id.get(account_id)
+        if existing is None:
+            existing = self._by_id[account_id] = {"id": account_id}
+        existing.update({k: v for k, v in normalize_record(account).items() if v is not None})
+        for key in LOOKUP_KEYS:
+            value = existing.get(key)
+            if value:
+                self._by_key[str(value).strip().lower()] = account_id
+
+    def merge_references(self, references: Optional[Dict[str, Any]]) -> None:
+        """Merge references.accounts into the directory."""
+        if not isinstance(references, dict):
+            return
+        accounts = references.get("accounts")
+        if isinstance(accounts, dict):
+            for account_id, account in accounts.items():
+                if isinstance(account, dict):
+                    self._add(account_id, account)
+
+    async def _fetch_all(self) -> List[Dict[str, Any]]:
+        accounts: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            url = f"{BASE_URL}/api/account?limit={PAGE_SIZE}&offset={offset}&search=&with_teams=true"
+            response = await api_get(url)
+            response.raise_for_status()
+            page = response.json()
+            if isinstance(page, dict):
+                page = page.get("results", [])
+            accounts.extend(page)
+            if len(page) < PAGE_SIZE:
+                return accounts
+            offset += PAGE_SIZE
+
+    async def _refresh_locked(self) -> None:
+        self._refreshed_at = time.monotonic()
+        for account in await self._fetch_all():
+            if account.get("id"):
+                self._add(account["id"], account)
+        self._loaded_at = time.monotonic()
+
+    async def refresh(self) -> None:
+        async with self._lock:
+            await self._refresh_locked()
+
+    async def _ensure_loaded(self) -> None:
+        if time.monotonic() - self._loaded_at < ACCOUNT_TTL:
+            return
+        async with self._lock:
+            if time.monotonic() - self._loaded_at >= ACCOUNT_TTL:
+                await self._refresh_locked()
+
+    async def _refresh_on_miss(self) -> bool:
+        if time.monotonic() - self._refreshed_at < MISS_REFRESH_INTERVAL:
+            return False
+        async with self._lock:
+            if time.monotonic() - self._refreshed_at >= MISS_REFRESH_INTERVAL:
+                await self._refresh_locked()
+        return True
+
+    def _lookup(self, identifier: str) -> Optional[Dict[str, Any]]:
+        account = self._by_id.get(identifier)
+        if account is None:
+            account_id = self._by_key.get(identifier.strip().lower())
+            account = self._by_id.get(account_id) if account_id else None
+        return account
+
+    async def get(self, account_id: str) -> Optional[Dict[str, Any]]:
+        account = self._by_id.get(account_id)
+        if account is None:
+            await self._ensure_loaded()
+            account = self._by_id.get(account_id)
+            if account is None and await self._refresh_on_miss():
+                account = self._by_id.get(account_id)
+        return account
+
+    async def find(self, identifier: str) -> Optional[Dict[str, Any]]:
+        if not identifier or not identifier.strip():
+            return None
+        account = self._lookup(identifier)
+        if account is None:
+            await self._ensure_loaded()
+            account = self._lookup(identifier)
+            if account is None and await self._refresh_on_miss():
+                account = self._lookup(identifier)
+        return account
+
+    async def display_name(self, account_id: Optional[str], default: Optional[str] = "Unknown User") -> Optional[str]:
+        if not account_id:
+            return default
+        account = await self.get(account_id)
+        if not account:
+            return default
+        return account.get("name") or account.get("username") or account.get("email") or default
+
+    async def all(self) -> List[Dict[str, Any]]:
+        await self._ensure_loaded()
+        return list(self._by_id.values())
+
+    def invalidate(self) -> None:
+        self._loaded_at = 0.0
+        self._refreshed_at = 0.0
+
+
+_directory = AccountDirectory()
+
+
+def get_account_directory() -> AccountDirectory:
+    return _directory
+
+
+def merge_references(references: Optional[Dict[str, Any]]) -> None:
+    _directory.merge_references(references)
+
+
+async def display_name(account_id: Optional[str], default: Optional[str] = "Unknown User") -> Optional[str]:
+    return await _directory.display_name(account_id, default)
+
+
+async def find_account(identifier: str) -> Optional[Dict[str, Any]]:
+    return await _directory.find(identifier)
@@ -0,0 +1,408 @@
+"""
+agent.py runs the Claude tool-use loop for the chat endpoints (api_server.py and the mock server in main.py).
+
+Both endpoints used to call the synchronous anthropic.Anthropic client inside an async handler, so every model round
+trip blocked the event loop and one slow answer held up every other chat on the worker. The loop now awaits the
+AsyncAnthropic client with a request timeout, and run_cancellable() ties the whole loop to the HTTP request: when the
+browser goes away the model call and any running tool are cancelled instead of finishing for nobody.
+
+The methods:
+
+create_client():
+    AsyncAnthropic with MODEL_TIMEOUT (OPSREADY_MODEL_TIMEOUT seconds per model call) and the SDK's own retries.
+
+run_agent(client, messages, system, tools, call_tool, on_event=None, usage=None, route=None):
+    model call, run the tools it asked for with call_tool(name, input), send the results back, until the model stops
+    asking for tools. Appends every turn to messages and returns the final text. With on_event the model calls are
+    streamed and on_event gets {"type": "text", "text"} for every text delta plus "tool_start" / "tool_end" events.
+    Token usage of every model call (cache reads and writes included) is added up in the usage dict. Before the first
+    call the history is compacted if it grew past its token budget (see compaction.py).
+
+    With a route from intent_router.match_intent() the routed tool runs first, as if the model had asked for it, and
+    its output is the answer without any model call. When that tool fails the model takes over from its result.
+
+    The loop is bounded so a slow upstream or a model that keeps calling tools can not hold a worker: the whole chat
+    gets CHAT_DEADLINE seconds (OPSREADY_CHAT_DEADLINE), history compaction included, and at most MAX_ROUNDS model
+    calls (OPSREADY_MAX_ROUNDS). The system prompt of the last allowed round tells the model to answer with what it
+    has. When the deadline passes the running model call or tools are cancelled and the answer is the text and tool
+    results gathered so far, saying it is partial.
+
+    Every model call of a chat resends the same system prompt, tool schemas and earlier turns, so with PROMPT_CACHING
+    (OPSREADY_PROMPT_CACHING, on by default) the system prompt, the last tool and the newest message are marked as
+    cache breakpoints and the provider serves that prefix from its prompt cache instead of processing it again.
+
+run_tools(tool_use_blocks, call_tool, deadline=None):
+    runs all tool calls of one model turn concurrently (at most TOOL_CONCURRENCY at once, each cancelled after its
+    timeout in the tool registry or TOOL_TIMEOUT seconds, and at the deadline) and returns the tool_result blocks in the order the model asked for them. Each tool's time is
+    reported as soon as that tool finishes, so "compare Summit Base and North Station" costs the slowest lookup, not
+    the sum of them.
+
+run_cancellable(request, coro):
+    awaits coro, cancelling it and raising ClientDisconnected if the client disconnects first.
+
+stream_response(client, messages, system, tools, call_tool, on_done=None, route=None):
+    a server-sent-events StreamingResponse of run_agent's events, ending with a "done" event or an "error" event. The
+    done event carries the final response, the token usage and whatever await on_done(final_response) returns (by
+    default the conversation_history). The agent is cancelled if the client disconnects.
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from contextlib import suppress
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import anthropic
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from starlette.requests import Request
+
+from backend.compaction import compact_history
+from backend.intent_router import Route, record_fallback
+from backend.result_pages import strip_more_note
+from backend.tool_registry import REGISTRY, tool_failed, tool_matched_nothing
+
+MODEL = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
+MAX_TOKENS = 4096
+MODEL_TIMEOUT = float(os.getenv("OPSREADY_MODEL_TIMEOUT", 60))
+MODEL_RETRIES = 2
+DISCONNECT_POLL_INTERVAL = 0.5
+TOOL_CONCURRENCY = int(os.getenv("OPSREADY_TOOL_CONCURRENCY", 4))
+TOOL_TIMEOUT = float(os.getenv("OPSREADY_TOOL_TIMEOUT", 30))
+CHAT_DEADLINE = float(os.getenv("OPSREADY_CHAT_DEADLINE", 90))
+MAX_ROUNDS = int(os.getenv("OPSREADY_MAX_ROUNDS", 8))
+PARTIAL_RESULT_CHARS = 2000
+WRAP_UP_PROMPT = ("This is the last step for this question: answer now using the tool results you already have, "
+                  "and say what you could not look up.")
+PROMPT_CACHING = os.getenv("OPSREADY_PROMPT_CACHING", "1") != "0"
+CACHE_CONTROL = {"type": "ephemeral"}
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+ToolCaller = Callable[[str, Dict[str, Any]], Awaitable[str]]
+EventSink = Callable[[Dict[str, Any]], None]
+
+
+class ClientDisconnected(Exception):
+    """Raised when the HTTP client went away before the chat finished."""
+
+
+def create_client() -> anthropic.AsyncAnthropic:
+    return anthropic.AsyncAnthropic(
+        api_key=os.getenv("ANTHROPIC_API_KEY"),
+        timeout=MODEL_TIMEOUT,
+        max_retries=MODEL_RETRIES,
+    )
+
+
+def _cached_prefix(system: str, tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """system and tools with a cache breakpoint at the end of each, the caller's TOOLS list is not modified."""
+    cached_tools = list(tools)
+    if cached_tools:
+        cached_tools[-1] = {**cached_tools[-1], "cache_control": CACHE_CONTROL}
+    return {
+        "system": [{"type": "text", "text": system, "cache_control": CACHE_CONTROL}],
+        "tools": cached_tools,
+    }
+
+
+def _block_dict(block: Any) -> Dict[str, Any]:
+    return block.model_dump(exclude_none=True) if hasattr(block, "model_dump") else dict(block)
+
+
+def _with_breakpoint(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Copy of messages with a cache breakpoint on the newest message, so everything up to it is cached for the next call.
+    Only the copy is marked, the stored conversation never accumulates breakpoints (the API allows four).
+    """
+    if not messages:
+        return messages
+    last = messages[-1]
+    content = last["content"]
+    if isinstance(content, str):
+        blocks = [{"type": "text", "text": content}]
+    else:
+        blocks = [_block_dict(block) for block in content]
+    if not blocks:
+        return messages
+    blocks[-1] = {**blocks[-1], "cache_control": CACHE_CONTROL}
+    return messages[:-1] + [{**last, "content": blocks}]
+
+
+def _add_usage(usage: Optional[Dict[str, int]], response: Any) -> None:
+    if usage is None or getattr(response, "usage", None) is None:
+        return
+    for field in USAGE_FIELDS:
+        usage[field] = usage.get(field, 0) + (getattr(response.usage, field, None) or 0)
+
+
+async def _call_model(client: anthropic.AsyncAnthropic, on_event: Optional[EventSink], **request: Any) -> Any:
+    if PROMPT_CACHING:
+        # the SDK version we pin exposes cache_control and the cache token counts under the prompt caching beta
+        api = client.beta.prompt_caching.messages
+        request["messages"] = _with_breakpoint(request["messages"])
+    else:
+        api = client.messages
+    if on_event is None:
+        return await api.create(**request)
+    async with api.stream(**request) as stream:
+        async for text in stream.text_stream:
+            on_event({"type": "text", "text": text})
+        return await stream.get_final_message()
+
+
+def _wrap_up(request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The request for the last allowed round: the wrap-up instruction goes after the system prompt, not into the
+    conversation, so the stored history only ever has tool results in tool result messages. The cached system block
+    in front of it stays the same.
+    """
+    system = request["system"]
+    if isinstance(system, list):
+        system = system + [{"type": "text", "text": WRAP_UP_PROMPT}]
+    else:
+        system = f"{system}\n\n{WRAP_UP_PROMPT}"
+    return {**request, "system": system}
+
+
+def _remaining(deadline: float) -> float:
+    return deadline - time.monotonic()
+
+
+async def _call_model_by(deadline: float, client: anthropic.AsyncAnthropic, on_event: Optional[EventSink],
+                         **request: Any) -> Any:
+    if _remaining(deadline) <= 0:
+        raise asyncio.TimeoutError()
+    return await asyncio.wait_for(_call_model(client, on_event, **request), _remaining(deadline))
+
+
+def _partial_answer(turn: List[Dict[str, Any]]) -> str:
+    """What this turn found before the deadline: the model's text so far and the tool results that came back."""
+    texts, results = [], []
+    for message in turn:
+        content = message["content"]
+        if isinstance(content, str):
+            continue
+        for block in content:
+            # assistant turns hold the SDK's content blocks, tool results are plain dicts
+            block = block if isinstance(block, dict) else vars(block)
+            if block["type"] == "text" and message["role"] == "assistant" and block["text"].strip():
+                texts.append(block["text"].strip())
+            elif block["type"] == "tool_result" and not block.get("is_error"):
+                text = str(block.get("content", ""))
+                results.append(text if len(text) <= PARTIAL_RESULT_CHARS else text[:PARTIAL_RESULT_CHARS] + " ...")
+    parts = ["I could not finish this answer within the time limit, so it may be incomplete."] + texts
+    if results:
+        parts.append("Here is what I found so far:")
+        parts.extend(results)
+    return "\n\n".join(parts)
+
+
+async def _answer_from_route(
+    route: Route, messages: List[Dict[str, Any]], call_tool: ToolCaller, on_event: Optional[EventSink],
+    deadline: float,
+) -> Optional[str]:
+    """Runs the routed tool the way the model would have called it, its text is the answer unless it failed."""
+    tool_use = {"type": "tool_use", "id": f"toolu_route_{uuid.uuid4().hex[:20]}", "name": route.tool, "input": route.args}
+    texts = []
+
+    async def call_routed(name: str, tool_input: Dict[str, Any]) -> str:
+        texts.append(await call_tool(name, tool_input))
+        return texts[-1]
+
+    [result] = await run_tools([SimpleNamespace(**tool_use)], call_routed, on_event=on_event, deadline=deadline)
+    messages.append({"role": "assistant", "content": [tool_use]})
+    messages.append({"role": "user", "content": [result]})
+    # a lookup that found nothing may mean the rule misread the question ("Adam W" for "Adam Wilson"), let the model try
+    if result.get("is_error") or (texts and tool_matched_nothing(texts[0])):
+        record_fallback(route)
+        return None
+
+    # the tool result above keeps the fetch_more handle for the model, the user does not need to see it
+    answer = strip_more_note(result["content"])
+    if on_event:
+        on_event({"type": "text", "text": answer})
+    messages.append({"role": "assistant", "content": answer})
+    print(f"Answered {route.intent} with {route.tool}, no model call")
+    return answer
+
+
+async def run_agent(
+    client: anthropic.AsyncAnthropic,
+    messages: List[Dict[str, Any]],
+    system: str,
+    tools: List[Dict[str, Any]],
+    call_tool: ToolCaller,
+    on_event: Optional[EventSink] = None,
+    usage: Optional[Dict[str, int]] = None,
+    route: Optional[Route] = None,
+    max_rounds: int = MAX_ROUNDS,
+    deadline_seconds: float = CHAT_DEADLINE,
+) -> str:
+    deadline = time.monotonic() + deadline_seconds
+    if route is not None:
+        answer = await _answer_from_route(route, messages, call_tool, on_event, deadline)
+        if answer is not None:
+            return answer
+
+    try:
+        # its summary call is a model call too, it gets no more than what is left of the deadline
+        await asyncio.wait_for(compact_history(client, messages, usage=usage), max(0.0, _remaining(deadline)))
+    except asyncio.TimeoutError:
+        # messages are only replaced once the summary is back, the history is as it was (tool results maybe digested)
+        print("History compaction hit the chat deadline, sending the history without a summary")
+    request = dict(model=MODEL, max_tokens=MAX_TOKENS, system=system, tools=tools)
+    if PROMPT_CACHING:
+        request.update(_cached_prefix(system, tools))
+
+    turn_start = len(messages)
+    try:
+        response = await _call_model_by(deadline, client, on_event, messages=messages, **request)
+        _add_usage(usage, response)
+        rounds = 1
+
+        # Handle tool use (agentic loop)
+        while response.stop_reason == "tool_use" and rounds < max_rounds:
+            tool_use_blocks = [block for block in response.content if block.type == "tool_use"]
+            tool_results = await run_tools(tool_use_blocks, call_tool, on_event=on_event, deadline=deadline)
+
+            messages.append({"role": "assistant", "content": response.content})
+            messages.append({"role": "user", "content": tool_results})
+
+            round_request = _wrap_up(request) if rounds == max_rounds - 1 else request
+            response = await _call_model_by(deadline, client, on_event, messages=messages, **round_request)
+            _add_usage(usage, response)
+            rounds += 1
+    except asyncio.TimeoutError:
+        print(f"Chat hit its {deadline_seconds:g}s deadline, answering with what it has")
+        final_response = _partial_answer(messages[turn_start:])
+        if on_event:
+            on_event({"type": "text", "text": final_response})
+        messages.append({"role": "assistant", "content": final_response})
+        return final_response
+
+    if usage:
+        print("Claude usage: " + ", ".join(f"{field}={usage.get(field, 0)}" for field in USAGE_FIELDS))
+
+    final_response = "".join(block.text for block in response.content if hasattr(block, "text"))
+    if response.stop_reason == "tool_use":
+        # still asking for tools after MAX_ROUNDS, its unanswered tool calls are not kept
+        print(f"Chat stopped after {rounds} model rounds")
+        if not final_response.strip():
+            final_response = _partial_answer(messages[turn_start:])
+            if on_event:
+                on_event({"type": "text", "text": final_response})
+    messages.append({"role": "assistant", "content": final_response})
+    return final_response
+
+
+async def run_tools(
+    tool_use_blocks: List[Any],
+    call_tool: ToolCaller,
+    concurrency: int = TOOL_CONCURRENCY,
+    timeout: float = TOOL_TIMEOUT,
+    on_event: Optional[EventSink] = None,
+    deadline: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(tool_use: Any) -> Dict[str, Any]:
+        async with semaphore:
+            if on_event:
+                on_event({"type": "tool_start", "id": tool_use.id, "name": tool_use.name, "input": tool_use.input})
+            started = time.perf_counter()
+            is_error = False
+            tool_timeout = REGISTRY.timeout(tool_use.name, timeout)
+            if deadline is not None:
+                tool_timeout = max(0.0, min(tool_timeout, _remaining(deadline)))
+            try:
+                content = await asyncio.wait_for(call_tool(tool_use.name, tool_use.input), tool_timeout)
+                # the tool answered with its error message, the model is told it failed
+                is_error = tool_failed(content)
+                content = str(content)
+            except asyncio.TimeoutError:
+                content = f"Error executing {tool_use.name}: timed out after {tool_timeout:g}s"
+                is_error = True
+            except Exception as e:
+                content = f"Error executing {tool_use.name}: {str(e)}"
+                is_error = True
+            seconds = time.perf_counter() - started
+            print(f"Tool {tool_use.name} finished in {seconds:.2f}s" + (" (error)" if is_error else ""))
+            if on_event:
+                on_event({"type": "tool_end", "id": tool_use.id, "name": tool_use.name,
+                          "seconds": round(seconds, 3), "is_error": is_error})
+
+        result = {"type": "tool_result", "tool_use_id": tool_use.id, "content": content}
+        if is_error:
+            result["is_error"] = True
+        return result
+
+    # gather keeps the model's order no matter which tool finishes first
+    return list(await asyncio.gather(*(run_one(tool_use) for tool_use in tool_use_blocks)))
+
+
+async def run_cancellable(request: Request, coro: Awaitable[Any]) -> Any:
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+                raise ClientDisconnected()
+    finally:
+        # the handler itself was cancelled (server shutdown), take the agent down with it
+        if not task.done():
+            task.cancel()
+
+
+def _sse(event: Dict[str, Any]) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(jsonable_encoder(event))}\n\n"
+
+
+def stream_response(
+    client: anthropic.AsyncAnthropic,
+    messages: List[Dict[str, Any]],
+    system: str,
+    tools: List[Dict[str, Any]],
+    call_tool: ToolCaller,
+    on_done: Optional[Callable[[str], Awaitable[Dict[str, Any]]]] = None,
+    route: Optional[Route] = None,
+) -> StreamingResponse:
+    if on_done is None:
+        async def on_done(final_response: str) -> Dict[str, Any]:
+            return {"conversation_history": messages}
+    usage: Dict[str, int] = {}
+
+    async def events() -> AsyncIterator[str]:
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def run() -> None:
+            try:
+                final_response = await run_agent(client, messages, system, tools, call_tool,
+                                                 on_event=queue.put_nowait, usage=usage, route=route)
+                queue.put_nowait({"type": "done", "response": final_response, "usage": usage, **(await on_done(final_response))})
+            except anthropic.APITimeoutError:
+                queue.put_nowait({"type": "error", "detail": "Timed out waiting for Claude"})
+            except Exception as e:
+                queue.put_nowait({"type": "error", "detail": f"Error: {str(e)}"})
+            finally:
+                queue.put_nowait(None)
+
+        task = asyncio.ensure_future(run())
+        try:
+            while (event := await queue.get()) is not None:
+                yield _sse(event)
+        finally:
+            # the response is closed early when the client disconnects
+            task.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -2,37 +2,28 @@
 OpsReady Chatbot API Server
 Converts MCP tools to REST API endpoints and integrates with Claude API
 """
-import os
-import sys
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import anthropic
 
 
-sys.path.append(os.path.dirname(__file__))
-
-
-from tools.tool_recent_logins import get_recent_logins
-from tools.tool_get_user_tasks import get_user_tasks
-from tools.tool_debug_tasks_sample import get_task_sample
-from tools.tool_get_all_assigned_users import get_all_assigned_users
-from tools.tool_get_overdue_tasks import get_overdue_tasks
-from tools.tool_get_task_summary_report import get_task_summary_report
-from tools.tool_task_asignee import get_task_assignee
-from tools.tool_activity_feed import get_activity_feed
-from tools.tool_list_forms import get_workspace_forms_tool
-from tools.tool_get_asset_deficiencies import get_asset_deficiencies
-from tools.tool_work_orders import get_work_orders
-from tools.get_deficiency_details import get_deficiency_details
-from tools.tool_get_assets import get_assets
-from tools.tool_teams_tasks import get_team_tasks
-
+# before the backend imports, their settings (OPSREADY_*) are read from the environment when they are imported.
+# Tool modules are only imported on their first call (see tool_registry.py), keeping cold start short.
 load_dotenv()
 
+from backend.http_client import close_clients
+from backend.agent import ClientDisconnected, create_client, run_agent, run_cancellable, stream_response
+from backend.conversations import open_conversation, save_conversation
+from backend.intent_router import match_intent, stats as intent_router_stats
+from backend.rate_limiter import stats as upstream_stats
+from backend.timestamps import parse_stats
+from backend.tool_cache import cached_tool_caller, get_tool_cache
+from backend.tool_registry import REGISTRY
+
 # Initialize FastAPI
 app = FastAPI(title="OpsReady Chatbot API")
 
@@ -49,203 +40,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Anthropic client
-client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+# Initialize Anthropic client (async, so model calls never block the event loop)
+client = create_client()
 
 # Pydantic models
 class ChatMessage(BaseModel):
     message: str
+    # conversation_id refers to history kept on the server; conversation_history is for clients that keep their own
+    conversation_id: Optional[str] = None
     conversation_history: Optional[List[Dict[str, Any]]] = []
+    # run every tool again instead of answering from results cached in earlier turns
+    bypass_cache: bool = False
 
 class ChatResponse(BaseModel):
     response: str
-    conversation_history: List[Dict[str, Any]]
+    conversation_id: str
+    # left out when the request used a conversation_id, older clients without one still get the full history back
+    conversation_history: Optional[List[Dict[str, Any]]] = None
+    # token usage of the request, including prompt cache reads / writes
+    usage: Optional[Dict[str, int]] = None
 
-# Tool definitions for Claude API (converted from MCP format)
-TOOLS = [
-    {
-        "name": "get_recent_logins",
-        "description": "Returns users who have logged in since a certain date (YYYY-MM-DD)",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "since_date": {
-                    "type": "string",
-                    "description": "Date in YYYY-MM-DD format"
-                }
-            },
-            "required": ["since_date"]
-        }
-    },
-    {
-        "name": "get_user_tasks",
-        "description": "Get all tasks assigned to a specific user by name, username, or email",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "identifier": {
-                    "type": "string",
-                    "description": "Name, username, or email of the user"
-                }
-            },
-            "required": ["identifier"]
-        }
-    },
-    {
-        "name": "get_task_sample",
-        "description": "Return a small sample of tasks with basic fields for debugging",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "limit": {
-                    "type": "integer",
-                    "description": "How many tasks to show (default 5)",
-                    "default": 5
-                }
-            }
-        }
-    },
-    {
-        "name": "get_all_assigned_users",
-        "description": "List all users who currently have one or more tasks assigned, with task counts",
-        "input_schema": {
-            "type": "object",
-            "properties": {}
-        }
-    },
-    {
-        "name": "get_overdue_tasks",
-        "description": "List all tasks whose due date is before today (UTC)",
-        "input_schema": {
-            "type": "object",
-            "properties": {}
-        }
-    },
-    {
-        "name": "get_task_summary_report",
-        "description": "Generate a summary report of all OpsReady tasks: total, assigned/unassigned, overdue, due soon, and category breakdown",
-        "input_schema": {
-            "type": "object",
-            "properties": {}
-        }
-    },
-    {
-        "name": "get_task_assignee",
-        "description": "Retrieves task information from a given workspace. If the user asks for unassigned tasks, returns only those with no assignee",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "workspace_name": {
-                    "type": "string",
-                    "description": "The name of the workspace to get tasks from"
-                },
-                "unassigned_only": {
-                    "type": "boolean",
-                    "description": "If true, returns only tasks without an assigned user",
-                    "default": False
-                }
-            },
-            "required": ["workspace_name"]
-        }
-    },
-    {
-        "name": "get_team_tasks",
-        "description": "Get the tasks that are assigned to a team",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "team_name": {
-                    "type": "string",
-                    "description": "The name of the team to get tasks from"
-                }
-            },
-            "required": ["team_name"]
-        }
-    },
-    {
-        "name": "get_activity_feed",
-        "description": "Returns the most active users in a workspace, who has submitted forms, and recent activity",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "workspace_name": {
-                    "type": "string",
-                    "description": "Name of the workspace"
-                }
-            },
-            "required": ["workspace_name"]
-        }
-    },
-    {
-        "name": "get_workspace_forms",
-        "description": "Returns all available forms (and their IDs) for a specific OpsReady workspace",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "workspace_name": {
-                    "type": "string",
-                    "description": "The name of the OpsReady workspace (e.g., 'Summit Base')"
-                }
-            },
-            "required": ["workspace_name"]
-        }
-    },
-    {
-        "name": "get_workspace_deficiencies",
-        "description": "Fetches all deficiencies for a given workspace and lists their status",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "workspace_name": {
-                    "type": "string",
-                    "description": "The name of the workspace to fetch deficiencies for"
-                }
-            },
-            "required": ["workspace_name"]
-        }
-    },
-    {
-        "name": "get_deficiency_details",
-        "description": "Fetches all details about a given deficiency, including task and work order info",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "deficiency_id": {
-                    "type": "string",
-                    "description": "The deficiency ID"
-                }
-            },
-            "required": ["deficiency_id"]
-        }
-    },
-    {
-        "name": "get_work_orders",
-        "description": "Get work orders with optional status filter",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "status": {
-                    "type": "string",
-                    "description": "Status of work orders to filter by (e.g., 'Open', 'Closed')"
-                }
-            }
-        }
-    },
-    {
-        "name": "get_assets",
-        "description": "Fetches all assets from a workspace",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "workspace_name": {
-                    "type": "string",
-                    "description": "The workspace name"
-                }
-            },
-            "required": ["workspace_name"]
-        }
-    }
-]
+# Tool definitions for Claude API, generated from the shared tool registry
+TOOLS = REGISTRY.claude_tools()
 
 # System prompt for Claude
 SYSTEM_PROMPT = """You are an AI assistant for OpsReady, a workplace operations management platform. You help users query and manage:
@@ -265,119 +81,72 @@ Be helpful, concise, and professional. Format data clearly using markdown when a
 
 async def call_tool_function(tool_name: str, tool_input: Dict[str, Any]) -> str:
     """Execute the appropriate tool function based on tool name"""
-    try:
-        if tool_name == "get_recent_logins":
-            result = await get_recent_logins(tool_input["since_date"])
-        elif tool_name == "get_user_tasks":
-            result = await get_user_tasks(tool_input["identifier"])
-        elif tool_name == "get_task_sample":
-            result = await get_task_sample(tool_input.get("limit", 5))
-        elif tool_name == "get_all_assigned_users":
-            result = await get_all_assigned_users()
-        elif tool_name == "get_overdue_tasks":
-            result = await get_overdue_tasks()
-        elif tool_name == "get_task_summary_report":
-            result = await get_task_summary_report()
-        elif tool_name == "get_task_assignee":
-            result = await get_task_assignee(
-                tool_input["workspace_name"],
-                tool_input.get("unassigned_only", False)
-            )
-        elif tool_name == "get_team_tasks":
-            result = await get_team_tasks(tool_input["team_name"])
-        elif tool_name == "get_activity_feed":
-            result = await get_activity_feed(tool_input["workspace_name"])
-        elif tool_name == "get_workspace_forms":
-            result = await get_workspace_forms_tool(tool_input["workspace_name"])
-        elif tool_name == "get_workspace_deficiencies":
-            result = await get_asset_deficiencies(tool_input["workspace_name"])
-        elif tool_name == "get_deficiency_details":
-            result = await get_deficiency_details(tool_input["deficiency_id"])
-        elif tool_name == "get_work_orders":
-            result = await get_work_orders(status=tool_input.get("status"))
-        elif tool_name == "get_assets":
-            result = await get_assets(tool_input["workspace_name"])
-        else:
-            return f"Unknown tool: {tool_name}"
-        
-        # Extract text from TextContent objects
-        if isinstance(result, list):
-            return "\n".join([item.text for item in result if hasattr(item, 'text')])
-        return str(result)
-    
-    except Exception as e:
-        return f"Error executing {tool_name}: {str(e)}"
+    return await REGISTRY.call_text(tool_name, tool_input)
 
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: ChatMessage):
+async def chat(request: ChatMessage, http_request: Request):
     """Main chat endpoint - processes user message with Claude and tool execution"""
     try:
         # Build conversation history
-        messages = request.conversation_history + [
-            {"role": "user", "content": request.message}
-        ]
-        
-        # Initial Claude API call
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4096,
-            system=SYSTEM_PROMPT,
-            tools=TOOLS,
-            messages=messages
+        conversation_id, messages = await open_conversation(request.conversation_id, request.conversation_history)
+        messages.append({"role": "user", "content": request.message})
+
+        # Agentic loop on the async client, cancelled if the browser disconnects
+        usage: Dict[str, int] = {}
+        call_tool = cached_tool_caller(call_tool_function, TOOLS, request.bypass_cache)
+        final_response = await run_cancellable(
+            http_request,
+            run_agent(client, messages, SYSTEM_PROMPT, TOOLS, call_tool, usage=usage, route=match_intent(request.message)),
         )
-        
-        # Handle tool use (agentic loop)
-        while response.stop_reason == "tool_use":
-            # Extract tool calls
-            tool_use_blocks = [block for block in response.content if block.type == "tool_use"]
-            
-            # Execute each tool
-            tool_results = []
-            for tool_use in tool_use_blocks:
-                tool_result = await call_tool_function(tool_use.name, tool_use.input)
-                tool_results.append({
-                    "type": "tool_result",
-                    "tool_use_id": tool_use.id,
-                    "content": tool_result
-                })
-            
-            # Add assistant response and tool results to conversation
-            messages.append({"role": "assistant", "content": response.content})
-            messages.append({"role": "user", "content": tool_results})
-            
-            # Continue conversation with tool results
-            response = client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4096,
-                system=SYSTEM_PROMPT,
-                tools=TOOLS,
-                messages=messages
-            )
-        
-        # Extract final text response
-        final_response = ""
-        for block in response.content:
-            if hasattr(block, 'text'):
-                final_response += block.text
-        
-        # Update conversation history
-        messages.append({"role": "assistant", "content": final_response})
-        
+
+        await save_conversation(conversation_id, messages)
+
         return ChatResponse(
             response=final_response,
-            conversation_history=messages
+            conversation_id=conversation_id,
+            conversation_history=None if request.conversation_id else messages,
+            usage=usage
         )
-    
+
+    except ClientDisconnected:
+        raise HTTPException(status_code=499, detail="Client disconnected")
+    except anthropic.APITimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out waiting for Claude")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatMessage):
+    """Streaming chat endpoint - server-sent events with text deltas and tool start / finish as they happen"""
+    conversation_id, messages = await open_conversation(request.conversation_id, request.conversation_history)
+    messages.append({"role": "user", "content": request.message})
+
+    async def on_done(final_response: str) -> Dict[str, Any]:
+        await save_conversation(conversation_id, messages)
+        done = {"conversation_id": conversation_id}
+        if not request.conversation_id:
+            done["conversation_history"] = messages
+        return done
+
+    call_tool = cached_tool_caller(call_tool_function, TOOLS, request.bypass_cache)
+    return stream_response(client, messages, SYSTEM_PROMPT, TOOLS, call_tool, on_done, route=match_intent(request.message))
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Close the pooled OpsReady HTTP connections"""
+    await close_clients()
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "tools_available": len(TOOLS)
+        "tools_available": len(TOOLS),
+        "tool_cache": get_tool_cache().stats(),
+        "intent_router": intent_router_stats(),
+        "upstream": upstream_stats(),
+        "timestamps": parse_stats()
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+"""
+categorizer.py sorts task titles into the categories of a taxonomy file, for the summary report.
+
+The report used to loop over eight hard-coded keywords and substring-search every title for each of them, so adding
+terms made it slower per term and "check" also matched "checkout". The taxonomy now lives in TAXONOMY_FILE
+(task_categories.json, or OPSREADY_TASK_TAXONOMY): category name -> list of terms, where a term can be several words
+("near miss"). All terms are compiled into one Aho-Corasick automaton whose symbols are words, so each title is
+scanned once, left to right, no matter how many terms there are, and terms only ever match whole words.
+
+The methods:
+
+get_categorizer():
+    the Categorizer for the taxonomy file, compiled on first use and again whenever the file changes.
+
+Categorizer.categorize(title):
+    the set of categories whose terms appear in the title.
+
+Categorizer.count(titles):
+    Counter of category -> number of titles in it (a title counts once per category).
+"""
+import json
+import os
+import re
+from collections import Counter, deque
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+TAXONOMY_FILE = os.getenv("OPSREADY_TASK_TAXONOMY", os.path.join(os.path.dirname(__file__), "task_categories.json"))
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+class Categorizer:
+    def __init__(self, taxonomy: Dict[str, Iterable[str]]):
+        # node 0 is the root; each node has word -> child transitions, a fail link and the categories ending there
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[FrozenSet[str]] = [frozenset()]
+        self.categories = list(taxonomy)
+
+        outputs: List[set] = [set()]
+        for category, terms in taxonomy.items():
+            for term in terms:
+                words = tokenize(term)
+                if not words:
+                    continue
+                node = 0
+                for word in words:
+                    nxt = self._goto[node].get(word)
+                    if nxt is None:
+                        nxt = self._goto[node][word] = len(self._goto)
+                        self._goto.append({})
+                        self._fail.append(0)
+                        outputs.append(set())
+                    node = nxt
+                outputs[node].add(category)
+
+        # breadth first so every fail link points at an already finished (shallower) node
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(word, 0)
+                outputs[child] |= outputs[self._fail[child]]
+                queue.append(child)
+        self._out = [frozenset(o) for o in outputs]
+
+    def categorize(self, title: str) -> FrozenSet[str]:
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        found: FrozenSet[str] = frozenset()
+        for word in tokenize(title):
+            while node and word not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(word, 0)
+            if out[node]:
+                found = found | out[node]
+        return found
+
+    def count(self, titles: Iterable[str]) -> Counter:
+        counts: Counter = Counter()
+        seen: Dict[str, FrozenSet[str]] = {}
+        for title in titles:
+            categories = seen.get(title)
+            if categories is None:
+                categories = seen[title] = self.categorize(title)
+            counts.update(categories)
+        return counts
+
+
+def load_taxonomy(path: str = TAXONOMY_FILE) -> Dict[str, List[str]]:
+    with open(path) as f:
+        taxonomy = json.load(f)
+    if not isinstance(taxonomy, dict):
+        raise ValueError(f"{path} must map category names to lists of terms")
+    return {str(category): [str(term) for term in terms] for category, terms in taxonomy.items()}
+
+
+_categorizer: Optional[Categorizer] = None
+_loaded_mtime: Optional[float] = None
+
+
+def get_categorizer() -> Categorizer:
+    global _categorizer, _loaded_mtime
+    mtime = os.path.getmtime(TAXONOMY_FILE)
+    if _categorizer is None or mtime != _loaded_mtime:
+        _categorizer = Categorizer(load_taxonomy())
+        _loaded_mtime = mtime
+    return _categorizer
@@ -0,0 +1,99 @@
+"""
+check_import_time.py measures how long the server entry points take to import and fails when that regresses.
+
+Containers and serverless instances pay the import time of api_server.py / main.py / server.py on every cold start.
+This script imports each entry point in a fresh interpreter with python -X importtime, a few times, and takes the median
+of the module's cumulative import time. It exits with status 1 when:
+
+- an entry point takes longer than its budget in BUDGETS_MS (or --budget-ms), or
+- an entry point imports something it should only import on first use (LAZY_MODULES: the tool modules, numpy).
+
+It prints the slowest imports of each entry point, which is where to look when the budget is exceeded.
+
+Run it from the repository root:
+
+    python backend/check_import_time.py
+    python backend/check_import_time.py backend.api_server --budget-ms 800 --runs 7
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# milliseconds, a small margin over the measured cumulative import time (api_server and main about 1000 ms, server
+# about 800 ms), so undoing the lazy imports fails the check. Before them api_server took about 1500 ms.
+BUDGETS_MS: Dict[str, float] = {
+    "backend.api_server": 1150,
+    "backend.main": 1150,
+    "backend.server": 950,
+}
+
+# modules that must not be imported at startup, they are loaded by the first tool call that needs them
+LAZY_MODULES: Dict[str, Tuple[str, ...]] = {
+    "backend.api_server": ("backend.tools", "numpy", "mcp"),
+    "backend.main": ("backend.tools", "numpy", "mcp"),
+    "backend.server": ("backend.tools", "numpy"),
+}
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds of every module imported by `import module`, in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def check(module: str, budget_ms: float, runs: int, top: int) -> List[str]:
+    samples = [import_times(module) for _ in range(runs)]
+    total_ms = statistics.median(sample[module] for sample in samples) / 1000
+    print(f"{module}: {total_ms:.0f} ms (median of {runs}, budget {budget_ms:.0f} ms)")
+
+    last = samples[-1]
+    slowest = sorted((t, name) for name, t in last.items() if "." not in name and name != module)[-top:]
+    for t, name in reversed(slowest):
+        print(f"    {t / 1000:7.1f} ms  {name}")
+
+    problems = []
+    if total_ms > budget_ms:
+        problems.append(f"{module} took {total_ms:.0f} ms to import, budget is {budget_ms:.0f} ms")
+    for lazy in LAZY_MODULES.get(module, ()):
+        eager = sorted(name for name in last if name == lazy or name.startswith(lazy + "."))
+        if eager:
+            problems.append(f"{module} imports {eager[0]} at startup, it should be imported on first use")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS_MS), help="entry point modules to check")
+    parser.add_argument("--budget-ms", type=float, help="budget for every module, instead of BUDGETS_MS")
+    parser.add_argument("--runs", type=int, default=5, help="imports per module, the median is compared (default 5)")
+    parser.add_argument("--top", type=int, default=8, help="how many of the slowest top level imports to show")
+    args = parser.parse_args()
+
+    problems = []
+    for module in args.modules:
+        budget = args.budget_ms or BUDGETS_MS.get(module, 1500)
+        problems += check(module, budget, max(1, args.runs), args.top)
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+compaction.py keeps the history of long chats inside a token budget.
+
+Every tool result (a full work order dump from get_work_orders, a few hundred task records) used to stay in the
+conversation forever, so a long session resent more and more tokens with every message until it no longer fit the
+context. compact_history() runs before each chat turn and, once the history is estimated above HISTORY_TOKEN_BUDGET
+(OPSREADY_HISTORY_TOKEN_BUDGET), shrinks it in two steps until it is back under COMPACT_TARGET of the budget:
+
+1. tool_result payloads older than the last KEEP_RECENT_TURNS turns are replaced with a short digest (which tool, how
+   big it was, and its first few hundred characters). The model already answered from them.
+2. if that is not enough, all turns before the last KEEP_RECENT_TURNS are summarized by the model into one paragraph,
+   which is put in front of the oldest kept question. A later compaction summarizes that summary along with the rest.
+
+Compacting well below the budget means it happens once every few turns rather than on every turn, which keeps the
+prompt cache (see agent.py) valid in between.
+
+The methods:
+
+estimate_tokens(messages):
+    rough token count of messages (about four characters per token of their JSON).
+
+compact_history(client, messages, usage=None):
+    compacts messages in place when they are over budget and returns the estimated tokens saved.
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import anthropic
+from fastapi.encoders import jsonable_encoder
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("OPSREADY_HISTORY_TOKEN_BUDGET", 24000))
+COMPACT_TARGET = 0.5
+KEEP_RECENT_TURNS = int(os.getenv("OPSREADY_KEEP_RECENT_TURNS", 2))
+CHARS_PER_TOKEN = 4
+DIGEST_CHARS = 300
+SUMMARY_MODEL = os.getenv("OPSREADY_SUMMARY_MODEL", os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514"))
+SUMMARY_MAX_TOKENS = 600
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+
+SUMMARY_PROMPT = """You summarize the start of a chat between an OpsReady user and an operations assistant.
+Write one short paragraph that keeps what later questions may refer to: the people, workspaces, tasks and forms that
+came up, the numbers and dates that were reported, and any open question. Leave out greetings and formatting."""
+
+Messages = List[Dict[str, Any]]
+
+
+def estimate_tokens(messages: Messages) -> int:
+    return len(json.dumps(jsonable_encoder(messages, exclude_none=True), separators=(",", ":"))) // CHARS_PER_TOKEN
+
+
+def _blocks(message: Dict[str, Any]) -> List[Dict[str, Any]]:
+    content = message["content"]
+    if isinstance(content, str):
+        return [{"type": "text", "text": content}]
+    return jsonable_encoder(content, exclude_none=True)
+
+
+def _turn_starts(messages: Messages) -> List[int]:
+    """
+    Index of every user question. Tool results are user messages too and can carry text next to the results (older
+    histories have the agent's wrap-up note there), so only a user message without any tool_result starts a turn.
+    A start whose previous message still has a tool_use is skipped: cutting there would separate the tool_use from
+    its tool_result, which the API rejects.
+    """
+    starts = []
+    for i, message in enumerate(messages):
+        if message["role"] != "user":
+            continue
+        types = {block["type"] for block in _blocks(message)}
+        if "text" in types and "tool_result" not in types and not (i and _has_tool_use(messages[i - 1])):
+            starts.append(i)
+    return starts
+
+
+def _has_tool_use(message: Dict[str, Any]) -> bool:
+    return message["role"] == "assistant" and any(block["type"] == "tool_use" for block in _blocks(message))
+
+
+def _result_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    return " ".join(block.get("text", "") for block in jsonable_encoder(content) if isinstance(block, dict))
+
+
+def _digest(tool_name: str, content: Any) -> str:
+    text = _result_text(content)
+    if len(text) <= DIGEST_CHARS:
+        return text
+    return (
+        f"[{tool_name} result from an earlier turn, {len(text)} characters, compacted] "
+        f"{text[:DIGEST_CHARS].rstrip()} ..."
+    )
+
+
+def _digest_tool_results(messages: Messages, end: int) -> bool:
+    """Digest every tool_result in messages[:end], returns whether anything changed."""
+    tool_names: Dict[str, str] = {}
+    changed = False
+    for i in range(end):
+        message = messages[i]
+        if isinstance(message["content"], str):
+            continue
+        blocks = _blocks(message)
+        for block in blocks:
+            if block["type"] == "tool_use":
+                tool_names[block["id"]] = block["name"]
+            elif block["type"] == "tool_result":
+                digest = _digest(tool_names.get(block["tool_use_id"], "tool"), block.get("content", ""))
+                if digest != block.get("content"):
+                    block["content"] = digest
+                    changed = True
+        messages[i] = {**message, "content": blocks}
+    return changed
+
+
+def _transcript(messages: Messages) -> str:
+    lines = []
+    for message in messages:
+        speaker = "User" if message["role"] == "user" else "Assistant"
+        for block in _blocks(message):
+            if block["type"] == "text" and block["text"].strip():
+                lines.append(f"{speaker}: {block['text'].strip()}")
+            elif block["type"] == "tool_use":
+                lines.append(f"Assistant called {block['name']}({json.dumps(block.get('input', {}))})")
+            elif block["type"] == "tool_result":
+                lines.append(f"Tool result: {_digest('tool', block.get('content', ''))}")
+    return "\n".join(lines)
+
+
+async def _summarize(client: anthropic.AsyncAnthropic, messages: Messages, usage: Optional[Dict[str, int]]) -> str:
+    transcript = _transcript(messages)
+    try:
+        response = await client.messages.create(
+            model=SUMMARY_MODEL,
+            max_tokens=SUMMARY_MAX_TOKENS,
+            system=SUMMARY_PROMPT,
+            messages=[{"role": "user", "content": transcript}],
+        )
+    except anthropic.APIError as e:
+        # better a clipped transcript than a history that no longer fits
+        print(f"History summary failed, keeping the end of the transcript: {e}")
+        return transcript[-HISTORY_TOKEN_BUDGET * CHARS_PER_TOKEN // 10:]
+    if usage is not None and getattr(response, "usage", None) is not None:
+        for field in ("input_tokens", "output_tokens"):
+            usage[field] = usage.get(field, 0) + (getattr(response.usage, field, None) or 0)
+    return "".join(block.text for block in response.content if hasattr(block, "text")).strip()
+
+
+async def compact_history(
+    client: anthropic.AsyncAnthropic,
+    messages: Messages,
+    usage: Optional[Dict[str, int]] = None,
+    budget: int = HISTORY_TOKEN_BUDGET,
+) -> int:
+    before = estimate_tokens(messages)
+    if before <= budget:
+        return 0
+    target = int(budget * COMPACT_TARGET)
+    turns = _turn_starts(messages)
+    if len(turns) <= KEEP_RECENT_TURNS:
+        return 0
+    keep_from = turns[-KEEP_RECENT_TURNS]
+
+    if _digest_tool_results(messages, keep_from) and estimate_tokens(messages) <= target:
+        after = estimate_tokens(messages)
+        print(f"Compacted history: {before} -> {after} tokens (tool results digested)")
+        return before - after
+
+    summary = await _summarize(client, messages[:keep_from], usage)
+    first_kept = messages[keep_from]
+    messages[:keep_from + 1] = [{
+        "role": "user",
+        "content": [{"type": "text", "text": f"{SUMMARY_PREFIX} {summary}"}] + _blocks(first_kept),
+    }]
+    after = estimate_tokens(messages)
+    print(f"Compacted history: {before} -> {after} tokens ({len(turns) - KEEP_RECENT_TURNS} turns summarized)")
+    return before - after
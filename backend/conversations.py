@@ -0,0 +1,133 @@
+"""
+conversations.py keeps chat conversations on the server, keyed by conversation id.
+
+The browser used to send the whole conversation_history (tool results included) with every message and get all of it
+back with every answer, so each request grew with the length of the session. The chat endpoints now hand out a
+conversation_id; the client sends it with the next message and the server looks the history up here. Conversations are
+kept in an in-memory LRU of MAX_CONVERSATIONS entries, and when OPSREADY_CONVERSATION_DB names a SQLite file they are
+also written there, so they survive restarts and LRU eviction. sqlite3 blocks, so the database reads and writes run
+in a worker thread (asyncio.to_thread), one at a time, and a long chat never holds up the other requests.
+
+Clients that still send conversation_history without a conversation_id keep working: their history is used as is and
+they get the full history back like before.
+
+The methods:
+
+await open_conversation(conversation_id, history):
+    (conversation_id, messages) for a request. Unknown or missing ids start a new conversation from history.
+
+await save_conversation(conversation_id, messages):
+    stores the messages (SDK content blocks are converted to plain dicts first).
+
+get_conversation_store():
+    the process wide ConversationStore, for (awaited) get / save / delete.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+MAX_CONVERSATIONS = int(os.getenv("OPSREADY_MAX_CONVERSATIONS", 1000))
+CONVERSATION_DB = os.getenv("OPSREADY_CONVERSATION_DB")
+
+Messages = List[Dict[str, Any]]
+
+
+class ConversationStore:
+    def __init__(self, max_conversations: int = MAX_CONVERSATIONS, path: Optional[str] = CONVERSATION_DB):
+        self.max_conversations = max_conversations
+        self.path = path
+        self._cache: "OrderedDict[str, Messages]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        # the connection is used from worker threads, never two at once
+        self._db_lock = threading.Lock()
+
+    @property
+    def db(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS conversations (id TEXT PRIMARY KEY, updated_at REAL, messages TEXT NOT NULL)"
+            )
+        return self._db
+
+    def _remember(self, conversation_id: str, messages: Messages) -> None:
+        self._cache[conversation_id] = messages
+        self._cache.move_to_end(conversation_id)
+        while len(self._cache) > self.max_conversations:
+            self._cache.popitem(last=False)
+
+    def _locked(self, fn: Callable, *args: Any) -> Any:
+        with self._db_lock:
+            return fn(*args)
+
+    async def _run(self, fn: Callable, *args: Any) -> Any:
+        """Run a database function in a worker thread, off the event loop."""
+        return await asyncio.to_thread(self._locked, fn, *args)
+
+    def _read(self, conversation_id: str) -> Optional[Messages]:
+        row = self.db.execute("SELECT messages FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write(self, conversation_id: str, messages: Messages) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO conversations (id, updated_at, messages) VALUES (?, ?, ?)",
+            (conversation_id, time.time(), json.dumps(messages, separators=(",", ":"))),
+        )
+        self.db.commit()
+
+    def _delete(self, conversation_id: str) -> None:
+        self.db.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+        self.db.commit()
+
+    async def get(self, conversation_id: str) -> Optional[Messages]:
+        """A copy of the stored messages, or None for an unknown id."""
+        messages = self._cache.get(conversation_id)
+        if messages is not None:
+            self._cache.move_to_end(conversation_id)
+        elif self.path:
+            messages = await self._run(self._read, conversation_id)
+            if messages is None:
+                return None
+            self._remember(conversation_id, messages)
+        else:
+            return None
+        return list(messages)
+
+    async def save(self, conversation_id: str, messages: Messages) -> None:
+        messages = jsonable_encoder(messages, exclude_none=True)
+        self._remember(conversation_id, messages)
+        if self.path:
+            await self._run(self._write, conversation_id, messages)
+
+    async def delete(self, conversation_id: str) -> None:
+        self._cache.pop(conversation_id, None)
+        if self.path:
+            await self._run(self._delete, conversation_id)
+
+
+_store = ConversationStore()
+
+
+def get_conversation_store() -> ConversationStore:
+    return _store
+
+
+async def open_conversation(conversation_id: Optional[str], history: Optional[Messages] = None) -> Tuple[str, Messages]:
+    if conversation_id:
+        messages = await _store.get(conversation_id)
+        if messages is not None:
+            return conversation_id, messages
+    return conversation_id or uuid.uuid4().hex, list(history or [])
+
+
+async def save_conversation(conversation_id: str, messages: Messages) -> None:
+    await _store.save(conversation_id, messages)
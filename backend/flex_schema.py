@@ -0,0 +1,126 @@
+"""
+flex_schema.py is the registry of flex table schemas, so tools can use field aliases instead of hard-coded field UUIDs.
+
+Every form record comes back as {"fields": {"<field uuid>": {"value": ...}}}. The uuids change when a form is re-created,
+but the system_alias of each field (status, deficiency, _project, ...) does not. /api/table/{flex_id} lists the fields
+with both, so the registry loads it once per table and maps alias -> field id (backend/form_ids is the hand written
+version of the same thing).
+
+The methods:
+
+get_schema(flex_id, required=()):
+    returns the FlexSchema of a table, loading it on first use. If one of the required aliases is missing from a cached
+    schema (the form was re-created) the schema is loaded again once.
+
+get_form_schema(form_access_id, required=()):
+    same, going through form_resolver to find the flex table of a form. If the cached flex table is gone (404, the form
+    was re-created) the form and its schema are forgotten and resolved again once.
+
+FlexSchema.field_id(alias):
+    field uuid for an alias, for building query filters.
+
+FlexSchema.extractor(*aliases, default=...):
+    a function that turns a record into a tuple of just those field values, in that order.
+"""
+import asyncio
+import httpx
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from backend.opsready import BASE_URL, api_get
+from backend.form_resolver import invalidate_form, resolve_flex_id
+
+
+class SchemaError(Exception):
+    """Raised when a table does not have a field a tool needs."""
+
+
+_EMPTY: Dict[str, Any] = {}
+
+
+def make_extractor(field_ids: Tuple[str, ...], defaults: Tuple[Any, ...]) -> Callable[[Dict], Tuple]:
+    """record -> tuple of the values of the given field ids, default where a field is missing."""
+    columns = tuple(zip(field_ids, defaults))
+
+    def extract(record: Dict) -> Tuple:
+        fields = record.get("fields") or _EMPTY
+        return tuple((fields.get(field_id) or _EMPTY).get("value", default) for field_id, default in columns)
+
+    return extract
+
+
+class FlexSchema:
+    def __init__(self, flex_id: str, definition: Dict[str, Any]):
+        self.flex_id = flex_id
+        self.fields_by_alias: Dict[str, str] = {}
+        self.types: Dict[str, str] = {}
+        for field in definition.get("fields", []):
+            alias = field.get("system_alias")
+            if alias and field.get("id"):
+                self.fields_by_alias[alias] = field["id"]
+                self.types[alias] = field.get("$type", "")
+        self._extractors: Dict[Tuple, Callable[[Dict], Tuple]] = {}
+
+    def has(self, *aliases: str) -> bool:
+        return all(alias in self.fields_by_alias for alias in aliases)
+
+    def field_id(self, alias: str) -> str:
+        try:
+            return self.fields_by_alias[alias]
+        except KeyError:
+            raise SchemaError(f"Table {self.flex_id} has no field '{alias}'") from None
+
+    def extractor(self, *aliases: str, default: Any = None, defaults: Optional[Iterable[Any]] = None) -> Callable[[Dict], Tuple]:
+        """record -> tuple of the aliased values, built once per alias list and cached on the schema."""
+        defaults = tuple(defaults) if defaults is not None else (default,) * len(aliases)
+        key = (aliases, defaults)
+        extract = self._extractors.get(key)
+        if extract is None:
+            field_ids = tuple(self.field_id(alias) for alias in aliases)
+            extract = self._extractors[key] = make_extractor(field_ids, defaults)
+        return extract
+
+
+_schemas: Dict[str, FlexSchema] = {}
+_lock = asyncio.Lock()
+
+
+async def _load(flex_id: str) -> FlexSchema:
+    response = await api_get(f"{BASE_URL}/api/table/{flex_id}")
+    response.raise_for_status()
+    schema = _schemas[flex_id] = FlexSchema(flex_id, response.json())
+    return schema
+
+
+async def get_schema(flex_id: str, required: Iterable[str] = ()) -> FlexSchema:
+    required = tuple(required)
+    schema = _schemas.get(flex_id)
+    if schema is not None and schema.has(*required):
+        return schema
+
+    async with _lock:
+        schema = _schemas.get(flex_id)
+        if schema is None or not schema.has(*required):
+            schema = await _load(flex_id)
+    for alias in required:
+        schema.field_id(alias)
+    return schema
+
+
+async def get_form_schema(form_access_id: str, required: Iterable[str] = ()) -> FlexSchema:
+    flex_id = await resolve_flex_id(form_access_id)
+    try:
+        return await get_schema(flex_id, required)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 404:
+            raise
+    # same as form_resolver.query_form_table: the cached flex id is stale, resolve the form again and retry once
+    invalidate_form(form_access_id)
+    invalidate_schema(flex_id)
+    return await get_schema(await resolve_flex_id(form_access_id), required)
+
+
+def invalidate_schema(flex_id: Optional[str] = None) -> None:
+    if flex_id is None:
+        _schemas.clear()
+    else:
+        _schemas.pop(flex_id, None)
@@ -0,0 +1,115 @@
+"""
+form_resolver.py resolves a form access id to the flex table behind it, and remembers the answer.
+
+To query a form's records we need its flex_definition_id, which takes two requests to learn:
+/api/form/access/{id} gives the template_id and /api/form/template/{template_id} gives the flex_definition_id.
+That chain practically never changes, so it is cached in memory and in a small JSON file (CACHE_FILE) keyed by form
+access id, and a deficiency or asset query becomes a single POST.
+
+The methods:
+
+resolve_flex_id(form_access_id):
+    returns the flex_definition_id, from memory, then disk, then the API.
+
+query_form_table(form_access_id, body):
+    resolves the flex id and POSTs the query to /api/table/{flex_id}/query. If the cached table is gone (404) the entry is
+    invalidated, resolved again and the query retried once.
+
+invalidate_form(form_access_id=None):
+    drops one cached chain (or all of them) from memory and disk.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+from backend.opsready import BASE_URL, api_get, api_post
+
+CACHE_DIR = os.getenv("OPSREADY_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".cache"))
+CACHE_FILE = os.path.join(CACHE_DIR, "form_flex_ids.json")
+
+
+class FormResolutionError(Exception):
+    """Raised when a form access id does not lead to a flex table."""
+
+
+_forms: Dict[str, Dict[str, Any]] = {}
+_loaded = False
+_lock = asyncio.Lock()
+
+
+def _load() -> None:
+    global _loaded
+    _loaded = True
+    try:
+        with open(CACHE_FILE) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    # the cache is only valid for the OpsReady instance that filled it
+    if data.get("base_url") == BASE_URL:
+        _forms.update(data.get("forms", {}))
+
+
+def _save() -> None:
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = CACHE_FILE + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"base_url": BASE_URL, "forms": _forms}, f, indent=2)
+        os.replace(tmp, CACHE_FILE)
+    except OSError as e:
+        print("Failed to write form cache", e)
+
+
+async def _fetch_chain(form_access_id: str) -> Dict[str, Any]:
+    access_response = await api_get(f"{BASE_URL}/api/form/access/{form_access_id}")
+    access_response.raise_for_status()
+    template_id = access_response.json().get("template_id")
+    if not template_id:
+        raise FormResolutionError(f"Failed to get template for form {form_access_id}")
+
+    template_response = await api_get(f"{BASE_URL}/api/form/template/{template_id}")
+    template_response.raise_for_status()
+    flex_id = template_response.json().get("flex_definition_id")
+    if not flex_id:
+        raise FormResolutionError(f"Failed to get flex table for template {template_id}")
+
+    return {"template_id": template_id, "flex_definition_id": flex_id, "resolved_at": time.time()}
+
+
+async def resolve_flex_id(form_access_id: str) -> str:
+    if not _loaded:
+        _load()
+    entry = _forms.get(form_access_id)
+    if entry:
+        return entry["flex_definition_id"]
+
+    async with _lock:
+        entry = _forms.get(form_access_id)
+        if not entry:
+            entry = _forms[form_access_id] = await _fetch_chain(form_access_id)
+            _save()
+    return entry["flex_definition_id"]
+
+
+def invalidate_form(form_access_id: Optional[str] = None) -> None:
+    if not _loaded:
+        _load()
+    if form_access_id is None:
+        _forms.clear()
+    else:
+        _forms.pop(form_access_id, None)
+    _save()
+
+
+async def query_form_table(form_access_id: str, body: Dict[str, Any], **kwargs):
+    """POST a table query for a form, returns the httpx response."""
+    flex_id = await resolve_flex_id(form_access_id)
+    response = await api_post(f"{BASE_URL}/api/table/{flex_id}/query", json=body, **kwargs)
+    if response.status_code == 404:
+        invalidate_form(form_access_id)
+        flex_id = await resolve_flex_id(form_access_id)
+        response = await api_post(f"{BASE_URL}/api/table/{flex_id}/query", json=body, **kwargs)
+    return response
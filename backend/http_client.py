@@ -0,0 +1,125 @@
+"""
+http_client.py is the async HTTP layer every OpsReady call goes through.
+
+All tools are async, so they can not use requests (it blocks the whole event loop while one user's tool waits on the network).
+The clients made here are httpx.AsyncClient objects with a bounded keep-alive connection pool, so repeated calls to the
+OpsReady host reuse the same TCP/TLS connections instead of opening a new one per request. HTTP/2 is switched on when the
+h2 package is installed (pip install "httpx[http2]"), otherwise it falls back to HTTP/1.1.
+
+The methods:
+
+create_client(**kwargs):
+    makes a new pooled client with our limits and timeouts. The session manager in opsready.py owns one of these per credential set
+    because the login cookies live on the client.
+
+get_http_client():
+    process wide client with no login cookies, used for the CAS ticket requests.
+
+close_clients():
+    closes every client created here, called on server shutdown.
+
+count_requests():
+    context manager counting the OpsReady requests made inside it (by the current task and the tasks it starts), so
+    the tool cache knows how many requests a cached result saves.
+
+Every request sent by these clients waits for a slot from the outbound limiter in rate_limiter.py first (global and
+per endpoint class concurrency, plus a request rate), held until its response body has been read.
+"""
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+import httpx
+
+from backend.rate_limiter import LIMITER_ENABLED, endpoint_class, get_limiter, retry_after
+
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+MAX_CONNECTIONS = int(os.getenv("OPSREADY_MAX_CONNECTIONS", 20))
+MAX_KEEPALIVE = int(os.getenv("OPSREADY_MAX_KEEPALIVE", 10))
+KEEPALIVE_EXPIRY = float(os.getenv("OPSREADY_KEEPALIVE_EXPIRY", 60))
+REQUEST_TIMEOUT = float(os.getenv("OPSREADY_REQUEST_TIMEOUT", 30))
+
+LIMITS = httpx.Limits(
+    max_connections=MAX_CONNECTIONS,
+    max_keepalive_connections=MAX_KEEPALIVE,
+    keepalive_expiry=KEEPALIVE_EXPIRY,
+)
+TIMEOUT = httpx.Timeout(REQUEST_TIMEOUT, connect=10.0)
+
+_clients: List[httpx.AsyncClient] = []
+_shared: Optional[httpx.AsyncClient] = None
+
+
+class RequestCounter:
+    count = 0
+
+
+_request_counter: ContextVar[Optional[RequestCounter]] = ContextVar("opsready_request_counter", default=None)
+
+
+async def _count_request(request: httpx.Request) -> None:
+    counter = _request_counter.get()
+    if counter is not None:
+        counter.count += 1
+
+
+@contextmanager
+def count_requests() -> Iterator[RequestCounter]:
+    counter = RequestCounter()
+    token = _request_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _request_counter.reset(token)
+
+
+class LimitedAsyncClient(httpx.AsyncClient):
+    """AsyncClient that waits for an outbound limiter slot before each send, held through its redirects and body."""
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        if not LIMITER_ENABLED:
+            return await super().send(request, **kwargs)
+        kind = endpoint_class(request)
+        limiter = get_limiter()
+        async with limiter.slot(kind):
+            response = await super().send(request, **kwargs)
+        if response.status_code == 429:
+            limiter.throttled(kind, retry_after(response))
+        return response
+
+
+def create_client(**kwargs) -> httpx.AsyncClient:
+    """New pooled async client. follow_redirects matches what requests did for the login redirect."""
+    options = {
+        "http2": HTTP2,
+        "limits": LIMITS,
+        "timeout": TIMEOUT,
+        "follow_redirects": True,
+        "event_hooks": {"request": [_count_request]},
+    }
+    options.update(kwargs)
+    client = LimitedAsyncClient(**options)
+    _clients.append(client)
+    return client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _shared
+    if _shared is None or _shared.is_closed:
+        _shared = create_client()
+    return _shared
+
+
+async def close_clients() -> None:
+    global _shared
+    while _clients:
+        client = _clients.pop()
+        if not client.is_closed:
+            await client.aclose()
+    _shared = None
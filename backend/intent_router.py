@@ -0,0 +1,184 @@
+"""
+intent_router.py answers the most common chat questions straight from a tool, without asking the model.
+
+A large share of the questions are the same few ("show overdue tasks", "task summary", "open work orders"), and each one
+still cost two model calls: one to pick the tool and one to repeat its output. match_intent() recognizes those
+questions when it is sure about them and names the tool and arguments; run_agent() (agent.py) then runs that tool
+and returns its text as the answer. Anything it is not sure about goes to the model as before.
+
+A message that asks for more than the list itself (explain, why, how, compare, should ...) is never routed, the raw
+tool output would not answer it. Otherwise two deterministic checks, the first that matches wins:
+
+1. RULES, regular expressions that must match the whole (normalized) message. They can capture arguments, e.g. the
+   status of "open work orders" or the person in "tasks assigned to Adam Wilson".
+2. a small word-overlap classifier for the tools without arguments: the message's content words are compared with
+   example questions (EXAMPLES) and accepted when the Jaccard similarity with an example is above MIN_SIMILARITY
+   and no other intent comes close. "overdue tasks in Summit Base" shares too few words with "overdue tasks" and is
+   left to the model, which knows which tool filters by workspace.
+
+OPSREADY_INTENT_ROUTER=0 switches the fast path off. stats() (shown by /api/health) counts messages, routed messages per
+intent, the hit rate, and routed calls that fell back to the model because the tool failed or matched nothing
+(tool_registry.tool_no_match: "No tasks found for 'Adam W'" may just be a name the rule read wrong).
+
+The methods:
+
+match_intent(message):
+    Route(intent, tool, args) for a message the router is sure about, otherwise None.
+
+record_fallback(route):
+    called by the agent when a routed tool failed or found nothing and the model took over.
+
+stats():
+    the counters above.
+"""
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Pattern, Tuple
+
+from backend.categorizer import tokenize
+
+ROUTER_ENABLED = os.getenv("OPSREADY_INTENT_ROUTER", "1") != "0"
+MIN_SIMILARITY = 0.75
+MIN_MARGIN = 0.25
+
+
+class Route(NamedTuple):
+    intent: str
+    tool: str
+    args: Dict[str, Any]
+
+
+class Rule(NamedTuple):
+    intent: str
+    tool: str
+    pattern: Pattern
+
+
+_SHOW = r"(?:(?:show|list|get|give|display|find|pull up)\s+(?:me\s+)?)?(?:all\s+)?(?:of\s+)?(?:the\s+|our\s+)?"
+# a person's name, username or email: up to three words, none of them a preposition or time word, so "tasks assigned
+# to Adam in Summit Base" or "... to Adam this week" do not match at all and go to the model
+_NOT_NAME = (r"(?:the|a|an|me|us|our|my|nobody|no one|anyone|someone|everyone|in|at|for|from|on|by|with|within|"
+             r"of|to|and|or|but|this|next|last|today|tomorrow|yesterday|tonight|now|due|since|before|after|until|"
+             r"that|which|who|overdue|late|open|closed|week|month|year)")
+_NAME_WORD = r"(?!" + _NOT_NAME + r"\b)[\w.@'-]+"
+
+RULES: List[Rule] = [
+    Rule("overdue_tasks", "get_overdue_tasks",
+         re.compile(_SHOW + r"(?:overdue|late|past due)\s+tasks?", re.I)),
+    Rule("overdue_tasks", "get_overdue_tasks",
+         re.compile(r"(?:what|which)\s+tasks\s+are\s+(?:overdue|late|past due)(?:\s+right now|\s+today)?", re.I)),
+    Rule("task_summary", "get_task_summary_report",
+         re.compile(r"(?:(?:show|give|get|generate|create|run)\s+(?:me\s+)?)?(?:a\s+|the\s+)?task\s+summary(?:\s+report)?", re.I)),
+    Rule("task_summary", "get_task_summary_report",
+         re.compile(r"(?:summari[sz]e|summary of)\s+(?:all\s+)?(?:the\s+|our\s+)?tasks", re.I)),
+    Rule("work_orders", "get_work_orders",
+         re.compile(_SHOW + r"(?:(?P<status>open|closed)\s+)?work\s*orders", re.I)),
+    Rule("assigned_users", "get_all_assigned_users",
+         re.compile(r"(?:who|which users)\s+(?:has|have)\s+(?:tasks|tasks assigned|assigned tasks|any tasks)", re.I)),
+    Rule("assigned_users", "get_all_assigned_users",
+         re.compile(_SHOW + r"(?:assigned users|users with tasks)", re.I)),
+    Rule("user_tasks", "get_user_tasks",
+         re.compile(_SHOW + r"tasks\s+assigned\s+to\s+(?P<identifier>" + _NAME_WORD + r"(?:\s+" + _NAME_WORD + r"){0,2})",
+                    re.I)),
+    Rule("recent_logins", "get_recent_logins",
+         re.compile(r"(?:who|which users)\s+(?:has|have)\s+logged\s+in\s+since\s+(?P<since_date>\d{4}-\d{2}-\d{2})", re.I)),
+]
+
+# example questions for the classifier, only tools that take no arguments
+EXAMPLES: Dict[Tuple[str, str], List[str]] = {
+    ("overdue_tasks", "get_overdue_tasks"): ["overdue tasks", "tasks overdue", "late tasks", "tasks past due"],
+    ("task_summary", "get_task_summary_report"): ["task summary", "task summary report", "summary report tasks"],
+    ("work_orders", "get_work_orders"): ["work orders", "all work orders"],
+    ("assigned_users", "get_all_assigned_users"): ["assigned users", "users assigned tasks", "users with tasks"],
+}
+
+# words that ask for an explanation, an opinion or an analysis of the data rather than the data itself
+_ASKS_FOR_MORE = re.compile(
+    r"\b(?:explain|explanation|why|how|compare|comparison|versus|vs|should|analy[sz]e|analysis|describe|"
+    r"interpret|mean|means|recommend|suggest|prioriti[sz]e|trend|trends|predict|forecast|help)\b", re.I)
+_FILLER = re.compile(r"^(?:(?:hi|hey|hello|ok|okay|please|pls|can you|could you|would you|i want to|i'd like to|"
+                     r"i would like to|i need to|let me)[,!]?\s+)+", re.I)
+_PLEASE = re.compile(r",?\s+please\b", re.I)
+_STOP_WORDS = frozenset(
+    "a an the me my our us all of please show list get give display find see what which are is there any do we "
+    "can could would you i to tell about currently right now today".split()
+)
+
+
+def _normalize(message: str) -> str:
+    text = " ".join(message.split()).strip(" ?!.")
+    text = _FILLER.sub("", text)
+    return _PLEASE.sub("", text).strip(" ?!.,")
+
+
+def _stem(word: str) -> str:
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def _content_words(text: str) -> FrozenSet[str]:
+    return frozenset(_stem(word) for word in tokenize(text) if word not in _STOP_WORDS)
+
+
+_EXAMPLE_WORDS: List[Tuple[Tuple[str, str], FrozenSet[str]]] = [
+    (intent, _content_words(example)) for intent, examples in EXAMPLES.items() for example in examples
+]
+
+
+def _classify(text: str) -> Optional[Tuple[str, str]]:
+    words = _content_words(text)
+    if not words:
+        return None
+    best: Dict[Tuple[str, str], float] = {}
+    for intent, example in _EXAMPLE_WORDS:
+        score = len(words & example) / len(words | example)
+        best[intent] = max(best.get(intent, 0.0), score)
+    ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+    (intent, score), runner_up = ranked[0], ranked[1][1] if len(ranked) > 1 else 0.0
+    if score > MIN_SIMILARITY and score - runner_up >= MIN_MARGIN:
+        return intent
+    return None
+
+
+_stats: Counter = Counter()
+_by_intent: Counter = Counter()
+
+
+def match_intent(message: str) -> Optional[Route]:
+    if not ROUTER_ENABLED:
+        return None
+    _stats["messages"] += 1
+    text = _normalize(message)
+    route = None
+    if _ASKS_FOR_MORE.search(text):
+        return None
+    for rule in RULES:
+        match = rule.pattern.fullmatch(text)
+        if match:
+            args = {name: value for name, value in match.groupdict().items() if value}
+            route = Route(rule.intent, rule.tool, args)
+            break
+    else:
+        classified = _classify(text)
+        if classified:
+            route = Route(classified[0], classified[1], {})
+    if route:
+        _stats["routed"] += 1
+        _by_intent[route.intent] += 1
+    return route
+
+
+def record_fallback(route: Route) -> None:
+    _stats["fallbacks"] += 1
+
+
+def stats() -> Dict[str, Any]:
+    messages = _stats["messages"]
+    return {
+        "enabled": ROUTER_ENABLED,
+        "messages": messages,
+        "routed": _stats["routed"],
+        "hit_rate": round(_stats["routed"] / messages, 3) if messages else None,
+        "fallbacks": _stats["fallbacks"],
+        "by_intent": dict(_by_intent),
+    }
@@ -3,16 +3,24 @@ Mock OpsReady API Server
 returns realistic fake data
 """
 import os
+import sys
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import anthropic
 from dotenv import load_dotenv
 
+# the mock server shares the agent loop with api_server.py, so make the backend package importable when run from here
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# before the backend imports, their settings (OPSREADY_*) are read from the environment when they are imported
 load_dotenv()
 
+from backend.agent import ClientDisconnected, create_client, run_agent, run_cancellable, stream_response
+from backend.conversations import open_conversation, save_conversation
+from backend.tool_registry import REGISTRY
+
 app = FastAPI(title="OpsReady Chatbot API (Mock)")
 
 # CORS Configuration
@@ -28,17 +36,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Anthropic client
-client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+# Initialize Anthropic client (async, so model calls never block the event loop)
+client = create_client()
 
 # Pydantic models
 class ChatMessage(BaseModel):
     message: str
+    # conversation_id refers to history kept on the server; conversation_history is for clients that keep their own
+    conversation_id: Optional[str] = None
     conversation_history: Optional[List[Dict[str, Any]]] = []
 
 class ChatResponse(BaseModel):
     response: str
-    conversation_history: List[Dict[str, Any]]
+    conversation_id: str
+    # left out when the request used a conversation_id, older clients without one still get the full history back
+    conversation_history: Optional[List[Dict[str, Any]]] = None
+    # token usage of the request, including prompt cache reads / writes
+    usage: Optional[Dict[str, int]] = None
 
 # MOCK DATA
 MOCK_TASKS = [
@@ -161,8 +175,8 @@ Date Created: {wo['created']}
 ---------------------------------------""")
     return "\n".join(lines)
 
-async def mock_get_deficiencies(workspace: str) -> str:
-    return f"""**Deficiencies in {workspace}:**
+async def mock_get_deficiencies(workspace_name: str) -> str:
+    return f"""**Deficiencies in {workspace_name}:**
 1. Cracked window in lobby — Unresolved - DEF-001
 2. Broken door handle - Room 205 — Unresolved - DEF-002
 3. Water stain on ceiling — Resolved - DEF-003"""
@@ -193,67 +207,19 @@ async def mock_recent_logins(since_date: str) -> str:
 - mike.chen@opsready.com (2024-01-19)
 - david.martinez@opsready.com (2024-01-18)"""
 
+# Mock handlers for the tools this demo fakes, schemas and policies come from the shared tool registry
+MOCK_TOOLS = REGISTRY.with_handlers({
+    "get_overdue_tasks": mock_get_overdue_tasks,
+    "get_task_summary_report": mock_get_task_summary,
+    "get_work_orders": mock_get_work_orders,
+    "get_workspace_deficiencies": mock_get_deficiencies,
+    "get_user_tasks": mock_get_user_tasks,
+    "get_all_assigned_users": mock_get_all_assigned_users,
+    "get_recent_logins": mock_recent_logins,
+})
+
 # Tool definitions for Claude
-TOOLS = [
-    {
-        "name": "get_overdue_tasks",
-        "description": "List all tasks whose due date is before today",
-        "input_schema": {"type": "object", "properties": {}}
-    },
-    {
-        "name": "get_task_summary_report",
-        "description": "Generate a summary report of all tasks: total, assigned/unassigned, overdue, due soon",
-        "input_schema": {"type": "object", "properties": {}}
-    },
-    {
-        "name": "get_work_orders",
-        "description": "Get work orders with optional status filter",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "status": {"type": "string", "description": "Status filter (e.g., 'Open', 'Closed')"}
-            }
-        }
-    },
-    {
-        "name": "get_workspace_deficiencies",
-        "description": "Get all deficiencies for a workspace",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "workspace_name": {"type": "string", "description": "Workspace name"}
-            },
-            "required": ["workspace_name"]
-        }
-    },
-    {
-        "name": "get_user_tasks",
-        "description": "Get all tasks assigned to a specific user",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "identifier": {"type": "string", "description": "User name or email"}
-            },
-            "required": ["identifier"]
-        }
-    },
-    {
-        "name": "get_all_assigned_users",
-        "description": "List all users with tasks and their task counts",
-        "input_schema": {"type": "object", "properties": {}}
-    },
-    {
-        "name": "get_recent_logins",
-        "description": "Get users who logged in since a date (YYYY-MM-DD)",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "since_date": {"type": "string", "description": "Date in YYYY-MM-DD format"}
-            },
-            "required": ["since_date"]
-        }
-    }
-]
+TOOLS = MOCK_TOOLS.claude_tools()
 
 SYSTEM_PROMPT = """You are an AI assistant for OpsReady, a workplace operations management platform. You help users query and manage tasks, work orders, deficiencies, and assets.
 
@@ -263,81 +229,52 @@ Be helpful, concise, and professional. Format data clearly using markdown when a
 
 async def call_tool_function(tool_name: str, tool_input: Dict[str, Any]) -> str:
     """Execute mock tool functions"""
-    try:
-        if tool_name == "get_overdue_tasks":
-            return await mock_get_overdue_tasks()
-        elif tool_name == "get_task_summary_report":
-            return await mock_get_task_summary()
-        elif tool_name == "get_work_orders":
-            return await mock_get_work_orders(tool_input.get("status"))
-        elif tool_name == "get_workspace_deficiencies":
-            return await mock_get_deficiencies(tool_input["workspace_name"])
-        elif tool_name == "get_user_tasks":
-            return await mock_get_user_tasks(tool_input["identifier"])
-        elif tool_name == "get_all_assigned_users":
-            return await mock_get_all_assigned_users()
-        elif tool_name == "get_recent_logins":
-            return await mock_recent_logins(tool_input["since_date"])
-        else:
-            return f"Unknown tool: {tool_name}"
-    except Exception as e:
-        return f"Error executing {tool_name}: {str(e)}"
+    return await MOCK_TOOLS.call_text(tool_name, tool_input)
 
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: ChatMessage):
+async def chat(request: ChatMessage, http_request: Request):
     """Main chat endpoint"""
     try:
-        messages = request.conversation_history + [
-            {"role": "user", "content": request.message}
-        ]
-        
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4096,
-            system=SYSTEM_PROMPT,
-            tools=TOOLS,
-            messages=messages
+        conversation_id, messages = await open_conversation(request.conversation_id, request.conversation_history)
+        messages.append({"role": "user", "content": request.message})
+
+        usage: Dict[str, int] = {}
+        final_response = await run_cancellable(
+            http_request,
+            run_agent(client, messages, SYSTEM_PROMPT, TOOLS, call_tool_function, usage=usage),
         )
-        
-        # Handle tool use (agentic loop)
-        while response.stop_reason == "tool_use":
-            tool_use_blocks = [block for block in response.content if block.type == "tool_use"]
-            
-            tool_results = []
-            for tool_use in tool_use_blocks:
-                tool_result = await call_tool_function(tool_use.name, tool_use.input)
-                tool_results.append({
-                    "type": "tool_result",
-                    "tool_use_id": tool_use.id,
-                    "content": tool_result
-                })
-            
-            messages.append({"role": "assistant", "content": response.content})
-            messages.append({"role": "user", "content": tool_results})
-            
-            response = client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4096,
-                system=SYSTEM_PROMPT,
-                tools=TOOLS,
-                messages=messages
-            )
-        
-        final_response = ""
-        for block in response.content:
-            if hasattr(block, 'text'):
-                final_response += block.text
-        
-        messages.append({"role": "assistant", "content": final_response})
-        
+
+        await save_conversation(conversation_id, messages)
+
         return ChatResponse(
             response=final_response,
-            conversation_history=messages
+            conversation_id=conversation_id,
+            conversation_history=None if request.conversation_id else messages,
+            usage=usage
         )
-    
+
+    except ClientDisconnected:
+        raise HTTPException(status_code=499, detail="Client disconnected")
+    except anthropic.APITimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out waiting for Claude")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatMessage):
+    """Streaming chat endpoint - server-sent events with text deltas and tool start / finish as they happen"""
+    conversation_id, messages = await open_conversation(request.conversation_id, request.conversation_history)
+    messages.append({"role": "user", "content": request.message})
+
+    async def on_done(final_response: str) -> Dict[str, Any]:
+        await save_conversation(conversation_id, messages)
+        done = {"conversation_id": conversation_id}
+        if not request.conversation_id:
+            done["conversation_history"] = messages
+        return done
+
+    return stream_response(client, messages, SYSTEM_PROMPT, TOOLS, call_tool_function, on_done)
+
 @app.get("/api/health")
 async def health_check():
     """Health check"""
@@ -1,8 +1,12 @@
 """
-opsready.py is our authentication file. It loads our sandbox credentials from .env file and uses them authenticate our demo account so the API calls can 
-be made.
+opsready.py is our authentication file. It uses our sandbox credentials (OPSREADY_USERNAME / OPSREADY_PASSWORD, loaded from the .env file by the server
+entry points) to authenticate our demo account so the API calls can be made. Importing it has no side effects: the credentials are read when the first
+session is needed.
 The methods:
 
+All of these are async and go through the pooled httpx clients in http_client.py so they never block the event loop, and every request
+they make waits its turn in the outbound limiter (rate_limiter.py, the "auth" class) like the tools' requests do.
+
 get_tgt(username, password):
     responsible for getting the tgt from the opsready site, it calls the API to get the tgt, this is the first part of auth.
 
@@ -10,89 +14,105 @@ get_st(tgt, service):
     responsible for getting the st from the server. we have to provide the tgt before we can get the st. We also need to pass the service url which is the login
     url.
 
-get_session(st):
+get_api_session(st):
     we pass this method the st and it uses it to get the actual session that allows us to be able to pull data from APIs.
 
 get_csrf(session):
     this method is neeed for when we are working with form submissions and need to get flex ids, we need to pass it the authenticated session we were
     given and it returns us the csrf token
 
+SessionManager / get_session_manager():
+    tools should not run the tgt -> st -> session handshake themselves. The session manager keeps one authenticated session per
+    credential set for the whole process (one pooled async client), remembers when the TGT and the session cookie expire, and logs in again on its own when
+    the API answers 401. Tools call api_get / api_post (or get_session()) and get the live session handed to them.
+
 """
+import asyncio
 import os
-from dotenv import load_dotenv
-import requests
-from typing import Any, Dict, Optional
-from mcp.server.fastmcp import FastMCP
+import time
+import httpx
+from typing import Any, Dict, Optional, Tuple
+from backend.http_client import create_client, get_http_client
 
 
-load_dotenv()
-mcp = FastMCP("opsready")
 BASE_URL = "https://or-student-sandbox.opsready.com"
-USERNAME = os.getenv("OPSREADY_USERNAME")
-PASSWORD = os.getenv("OPSREADY_PASSWORD")
+SERVICE_URL = f"{BASE_URL}/api/login"
+
+# CAS hands out TGTs that live for hours, the api session cookie expires after it sits idle.
+# Both are kept a little under the server side values so we re-login before the server rejects us.
+TGT_TTL = int(os.getenv("OPSREADY_TGT_TTL", 6 * 60 * 60))
+SESSION_IDLE_TTL = int(os.getenv("OPSREADY_SESSION_IDLE_TTL", 20 * 60))
+
+
+class OpsReadyAuthError(Exception):
+    """Raised when the CAS handshake can not produce an authenticated session."""
 
 
 
 #recently works to get tgt and st not session
 #working
-def get_tgt(username: str, password: str) -> Optional[str]:
+async def get_tgt(username: str, password: str) -> Optional[str]:
     url = f"{BASE_URL}/cas/v1/tickets"
     headers = { "Content-Type": "application/x-www-form-urlencoded","Accept": "application/json" }
     data = {"username": username, "password": password}
     try:
-        response = requests.post(url, data=data, headers=headers)
+        response = await get_http_client().post(url, data=data, headers=headers)
         response.raise_for_status()
         tgt_url = response.text.strip()
         tgt = tgt_url.split("/")[-1]
         return tgt
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print("Failed to get TGT", e)
         return None
 
 #working
-def get_st(tgt: str, service: str) -> Optional[str]:
+async def get_st(tgt: str, service: str) -> Optional[str]:
     url = f"{BASE_URL}/cas/v1/tickets/{tgt}"
     headers = {"Content-Type": "application/x-www-form-urlencoded", "Accept": "application/json"}
     data = {"service": service}
     try:
-        response = requests.post(url, data=data, headers=headers)
+        response = await get_http_client().post(url, data=data, headers=headers)
         response.raise_for_status()
         st=response.text.strip()
         return st
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print("Failed to get ST", e)
         return None
 
-def get_api_session(st):
+async def get_api_session(st, session: Optional[httpx.AsyncClient] = None) -> httpx.AsyncClient:
+    # pass in an existing client to log it in again and keep its connection pool
+    if session is None:
+        session = create_client()
+    session.cookies.clear()
+
     url = f"{BASE_URL}/api/login?ticket={st}"
     print(f"\n=== Login Request ===")
     print(f"URL: {url}")
 
-    session = requests.Session()
-    response = session.get(url)
+    response = await session.get(url)
 
     print(f"Status Code: {response.status_code}")
     print(f"Response Headers: {dict(response.headers)}")
     print(f"Response Body: {response.text[:500]}")
-    print(f"Session Cookies: {session.cookies.get_dict()}")
+    print(f"Session Cookies: {dict(session.cookies)}")
     print(f"===================\n")
 
     response.raise_for_status()
     return session
 
-def get_csrf_token(session):
+async def get_csrf_token(session: httpx.AsyncClient):
     url = f"{BASE_URL}/api/csrf_token"
     print(f"\n=== CSRF Request ===")
     print(f"URL: {url}")
 
-    response = session.get(url)
+    response = await session.get(url)
 
     print("Status Code:", response.status_code)
     print("Headers:", dict(response.headers))
     print("Raw Text Response:", response.text[:200])
-    print("Cookies:", session.cookies.get_dict())
+    print("Cookies:", dict(session.cookies))
     print("====================\n")
 
     # CSRF token is stored in headers, NOT JSON
@@ -105,6 +125,129 @@ def get_csrf_token(session):
     print(" CSRF Token Found:", token)
     return token
 
+class SessionManager:
+    """
+    Holds one authenticated OpsReady session for a username/password pair.
+
+    The TGT is reused to mint new STs until it expires, and the session is reused until it has been idle
+    longer than SESSION_IDLE_TTL or the API answers 401, then the manager logs in again transparently.
+    The session is a single pooled httpx.AsyncClient that lives as long as the manager, re-logging in
+    only swaps its cookies so the keep-alive connections are never thrown away.
+    """
+
+    def __init__(self, username: str, password: str):
+        self.username = username
+        self.password = password
+        self._lock = asyncio.Lock()
+        self._tgt: Optional[str] = None
+        self._tgt_expires = 0.0
+        self._session: Optional[httpx.AsyncClient] = None
+        self._logged_in = False
+        self._session_expires = 0.0
+        self._login_count = 0
+        self._csrf: Optional[str] = None
+
+    async def _get_tgt(self) -> str:
+        if self._tgt and time.monotonic() < self._tgt_expires:
+            return self._tgt
+        tgt = await get_tgt(self.username, self.password)
+        if not tgt:
+            raise OpsReadyAuthError("Failed to get TGT (check credentials in .env)")
+        self._tgt = tgt
+        self._tgt_expires = time.monotonic() + TGT_TTL
+        return tgt
+
+    async def _login(self) -> httpx.AsyncClient:
+        st = await get_st(await self._get_tgt(), SERVICE_URL)
+        if not st:
+            # the TGT may have been revoked server side before our TTL, get a fresh one and try once more
+            self._tgt = None
+            st = await get_st(await self._get_tgt(), SERVICE_URL)
+            if not st:
+                raise OpsReadyAuthError("Failed to get ST for /api/login")
+
+        self._logged_in = False
+        self._session = await get_api_session(st, self._session)
+        self._logged_in = True
+        self._session_expires = time.monotonic() + SESSION_IDLE_TTL
+        self._login_count += 1
+        self._csrf = None
+        return self._session
+
+    async def _ensure_session(self) -> httpx.AsyncClient:
+        if self._session is None or not self._logged_in or time.monotonic() >= self._session_expires:
+            return await self._login()
+        return self._session
+
+    async def get_session(self) -> httpx.AsyncClient:
+        """Return the live session, logging in first if there is none or it has expired."""
+        async with self._lock:
+            return await self._ensure_session()
+
+    async def invalidate(self) -> None:
+        """Forget the login (and TGT) so the next call does a full login."""
+        async with self._lock:
+            self._logged_in = False
+            self._tgt = None
+            self._csrf = None
+
+    async def csrf_token(self) -> Optional[str]:
+        """CSRF token for the current session, fetched once per login."""
+        async with self._lock:
+            session = await self._ensure_session()
+            if not self._csrf:
+                self._csrf = await get_csrf_token(session)
+            return self._csrf
+
+    async def request(self, method: str, url: str, csrf: bool = False, **kwargs) -> httpx.Response:
+        """
+        Send a request with the shared session. On a 401 the session is rebuilt from the TGT and
+        the request is retried once. csrf=True adds the X-CSRF-Token header for the current session.
+        """
+        for attempt in range(2):
+            session = await self.get_session()
+            login = self._login_count
+            if csrf:
+                token = await self.csrf_token()
+                if not token:
+                    raise OpsReadyAuthError("Failed to retrieve CSRF token")
+                kwargs["headers"] = {**kwargs.get("headers", {}), "X-CSRF-Token": token}
+
+            response = await session.request(method, url, **kwargs)
+            if response.status_code != 401 or attempt:
+                self._session_expires = time.monotonic() + SESSION_IDLE_TTL
+                return response
+
+            async with self._lock:
+                # another request may already have logged in again while we waited for the lock
+                if self._login_count == login:
+                    await self._login()
+        return response
+
+
+_managers: Dict[Tuple[str, str], SessionManager] = {}
+
+
+def get_session_manager(username: Optional[str] = None, password: Optional[str] = None) -> SessionManager:
+    """Process wide session manager for a credential set, defaults to the .env credentials."""
+    key = (username or os.getenv("OPSREADY_USERNAME"), password or os.getenv("OPSREADY_PASSWORD"))
+    manager = _managers.get(key)
+    if manager is None:
+        manager = _managers[key] = SessionManager(*key)
+    return manager
+
+
+async def get_session() -> httpx.AsyncClient:
+    return await get_session_manager().get_session()
+
+
+async def api_get(url: str, **kwargs) -> httpx.Response:
+    return await get_session_manager().request("GET", url, **kwargs)
+
+
+async def api_post(url: str, **kwargs) -> httpx.Response:
+    return await get_session_manager().request("POST", url, **kwargs)
+
 '''
 #throws not allowed for url error
 def get_workspace(session: requests.Session) -> Optional[Dict]:
@@ -134,36 +277,32 @@ def get_workspace(session: requests.Session) -> Optional[Dict]:
         return None
 '''
 
-if __name__ == "__main__":
-    tgt = get_tgt(USERNAME, PASSWORD)
+async def main():
+    tgt = await get_tgt(os.getenv("OPSREADY_USERNAME"), os.getenv("OPSREADY_PASSWORD"))
     if not tgt:
         print("Failed to get TGT")
         exit(1)
 
     service_url = f"{BASE_URL}/api/login"
-    st = get_st(tgt, service_url)
+    st = await get_st(tgt, service_url)
     if not st:
         print("Failed to get ST")
         exit(1)
 
-    session = get_api_session(st)
+    session = await get_api_session(st)
     if not session:
         print("Failed to create API session")
         exit(1)
 
-    csfr_token = get_csrf_token(session)
+    csfr_token = await get_csrf_token(session)
     print("CSRF Token:", csfr_token)
     if not csfr_token:
         print("Failed to get CSRF token")
         exit(1)
 
-    
-
-
-
-
-
-
-
 
+if __name__ == "__main__":
+    from dotenv import load_dotenv
 
+    load_dotenv()
+    asyncio.run(main())
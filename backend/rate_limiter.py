@@ -0,0 +1,196 @@
+"""
+rate_limiter.py bounds how hard the backend hits the OpsReady API.
+
+Nothing used to limit the outbound requests: every chat runs its tools concurrently, every tool makes several requests,
+and a burst of chats turned into hundreds of simultaneous logins and table queries that OpsReady throttled. Every
+request sent by a client from http_client.py (the tools' api_get / api_post and the CAS helpers in opsready.py) now
+takes a slot from the process wide OutboundLimiter first:
+
+- a global concurrency limit (OPSREADY_UPSTREAM_CONCURRENCY) on requests in flight at once.
+- a limit per endpoint class (CLASS_LIMITS): "auth" for the CAS tickets, /api/login and /api/csrf_token, "query" for
+  the table queries (the expensive ones), "read" for the other GETs. A login storm can not take every global slot
+  from the queries, and the queries can not starve the cheap reads.
+- a token bucket (OPSREADY_UPSTREAM_RATE requests per second, bursts of OPSREADY_UPSTREAM_BURST) so the requests
+  leave at a steady rate. A token is only taken once the request has its slots, so waiting requests don't burn the
+  budget, and a 429 answer empties the bucket until its Retry-After has passed.
+
+Waiting requests are served in arrival order. OPSREADY_UPSTREAM_LIMITER=0 turns the limiter off. stats() (shown by
+/api/health) reports, per class, the requests sent, how many are in flight and queued, the largest queue, the time
+spent waiting, and the 429s.
+
+The methods:
+
+endpoint_class(request):
+    "auth", "query" or "read" for an httpx request.
+
+get_limiter():
+    the process wide OutboundLimiter. limiter.slot(endpoint_class) is the async context manager a request is sent in,
+    limiter.throttled(endpoint_class, retry_after) records a 429.
+
+stats():
+    the limiter's counters.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+LIMITER_ENABLED = os.getenv("OPSREADY_UPSTREAM_LIMITER", "1") != "0"
+MAX_CONCURRENCY = int(os.getenv("OPSREADY_UPSTREAM_CONCURRENCY", 8))
+RATE = float(os.getenv("OPSREADY_UPSTREAM_RATE", 10))
+BURST = int(os.getenv("OPSREADY_UPSTREAM_BURST", 20))
+CLASS_LIMITS: Dict[str, int] = {
+    "auth": int(os.getenv("OPSREADY_UPSTREAM_AUTH_CONCURRENCY", 2)),
+    "query": int(os.getenv("OPSREADY_UPSTREAM_QUERY_CONCURRENCY", 4)),
+    "read": int(os.getenv("OPSREADY_UPSTREAM_READ_CONCURRENCY", 6)),
+}
+# seconds the bucket stays empty after a 429 without a usable Retry-After header
+DEFAULT_RETRY_AFTER = 1.0
+
+AUTH_PATHS = ("/cas/", "/api/login", "/api/csrf_token")
+
+
+def endpoint_class(request: httpx.Request) -> str:
+    path = request.url.path
+    if path.startswith(AUTH_PATHS):
+        return "auth"
+    if request.method == "POST" and path.endswith("/query"):
+        return "query"
+    return "read"
+
+
+def retry_after(response: httpx.Response) -> float:
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", DEFAULT_RETRY_AFTER)))
+    except ValueError:
+        # an HTTP date, not worth parsing for a pause this short
+        return DEFAULT_RETRY_AFTER
+
+
+class TokenBucket:
+    """rate tokens per second, at most burst saved up. rate <= 0 means no rate limit."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        # asyncio.Lock wakes its waiters in order, so tokens are handed out first come first served
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                delay = self._paused_until - now
+                if delay <= 0 and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep(max(delay, (1 - self._tokens) / self.rate))
+
+    def pause(self, seconds: float) -> None:
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = 0.0
+        self._paused_until = max(self._paused_until, now + seconds)
+
+
+class ClassStats:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.requests = 0
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "avg_wait_ms": round(self.wait_seconds / self.requests * 1000, 1) if self.requests else None,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "throttled": self.throttled,
+        }
+
+
+class OutboundLimiter:
+    def __init__(self, concurrency: int = MAX_CONCURRENCY, class_limits: Optional[Dict[str, int]] = None,
+                 rate: float = RATE, burst: int = BURST):
+        self.concurrency = concurrency
+        self.rate = rate
+        self._global = asyncio.Semaphore(concurrency)
+        self._bucket = TokenBucket(rate, burst)
+        limits = class_limits or CLASS_LIMITS
+        self._classes = {name: asyncio.Semaphore(limit) for name, limit in limits.items()}
+        self._stats = {name: ClassStats(limit) for name, limit in limits.items()}
+
+    @asynccontextmanager
+    async def slot(self, endpoint_class: str) -> AsyncIterator[None]:
+        if endpoint_class not in self._classes:
+            endpoint_class = "read"
+        stats = self._stats[endpoint_class]
+        queued_at = time.monotonic()
+        stats.queued += 1
+        stats.max_queued = max(stats.max_queued, stats.queued)
+        admitted = False
+        try:
+            # class slot first: a request waiting for its class does not hold a global slot other classes could use
+            async with self._classes[endpoint_class], self._global:
+                await self._bucket.acquire()
+                admitted = True
+                stats.queued -= 1
+                waited = time.monotonic() - queued_at
+                stats.requests += 1
+                stats.wait_seconds += waited
+                stats.max_wait = max(stats.max_wait, waited)
+                stats.in_flight += 1
+                try:
+                    yield
+                finally:
+                    stats.in_flight -= 1
+        finally:
+            if not admitted:
+                # cancelled while still waiting for a slot
+                stats.queued -= 1
+
+    def throttled(self, endpoint_class: str, seconds: float) -> None:
+        self._stats.get(endpoint_class, self._stats["read"]).throttled += 1
+        self._bucket.pause(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": LIMITER_ENABLED,
+            "concurrency": self.concurrency,
+            "rate_per_second": self.rate,
+            "in_flight": sum(stats.in_flight for stats in self._stats.values()),
+            "queued": sum(stats.queued for stats in self._stats.values()),
+            "classes": {name: stats.as_dict() for name, stats in self._stats.items()},
+        }
+
+
+_limiter = OutboundLimiter()
+
+
+def get_limiter() -> OutboundLimiter:
+    return _limiter
+
+
+def stats() -> Dict[str, Any]:
+    return _limiter.stats()
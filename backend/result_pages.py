@@ -0,0 +1,109 @@
+"""
+result_pages.py keeps long tool results on the server and hands the model one page at a time.
+
+get_work_orders printed a 14 line block for every work order, and get_overdue_tasks / get_task_assignee /
+get_user_tasks one line per task with no cap, so a big workspace put hundreds of rows into the conversation and every
+later turn paid for them again. Those tools now format their rows as before and pass them to first_page(): when there
+are more than PAGE_SIZE (OPSREADY_RESULT_PAGE_SIZE) rows, only the first page is returned, the full list is kept here
+under a short handle, and the page ends with a note telling the model how to ask for the rest with the fetch_more tool.
+fetch_more serves those pages from memory, OpsReady is not queried again.
+
+Results are kept for RESULT_TTL seconds (OPSREADY_RESULT_TTL) and at most MAX_RESULTS of them, oldest dropped first.
+
+The methods:
+
+first_page(tool_name, rows, header="", footer=""):
+    the text for the tool's answer: header, the first page of rows and footer, plus the handle note when rows were cut.
+
+next_page(handle, offset, limit=None):
+    the text of rows[offset:offset + limit] of a kept result, with a note for the page after it.
+
+handle_of(text) / handle_expires(handle):
+    the fetch_more handle a tool's text refers to, and when that handle stops working (0 once it is gone). The tool
+    cache keeps such a text only as long as its handle.
+
+strip_more_note(text):
+    the text without the fetch_more note, for answers that go straight to the user.
+"""
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional
+
+PAGE_SIZE = int(os.getenv("OPSREADY_RESULT_PAGE_SIZE", 25))
+MAX_PAGE_SIZE = 100
+RESULT_TTL = int(os.getenv("OPSREADY_RESULT_TTL", 30 * 60))
+MAX_RESULTS = 200
+
+
+class StoredResult(NamedTuple):
+    tool_name: str
+    header: str
+    rows: List[str]
+    expires: float
+
+
+_results: "OrderedDict[str, StoredResult]" = OrderedDict()
+# the note _more_note() puts under a page that has more after it
+_MORE_NOTE = re.compile(r'\((Showing \d+-\d+ of \d+)\. For more, call fetch_more with handle "(\w+)" and offset \d+\.\)')
+
+
+def _store(tool_name: str, header: str, rows: List[str]) -> str:
+    now = time.monotonic()
+    for handle in [h for h, result in _results.items() if result.expires <= now]:
+        del _results[handle]
+    while len(_results) >= MAX_RESULTS:
+        _results.popitem(last=False)
+    handle = uuid.uuid4().hex[:12]
+    _results[handle] = StoredResult(tool_name, header, rows, now + RESULT_TTL)
+    return handle
+
+
+def _more_note(handle: str, start: int, end: int, total: int) -> str:
+    if end >= total:
+        return f"(Showing {start + 1}-{end} of {total}, this is the last page.)"
+    return (
+        f"(Showing {start + 1}-{end} of {total}. For more, call fetch_more with handle \"{handle}\" "
+        f"and offset {end}.)"
+    )
+
+
+def _join(*parts: str) -> str:
+    return "\n".join(part for part in parts if part)
+
+
+def first_page(tool_name: str, rows: List[str], header: str = "", footer: str = "", page_size: int = PAGE_SIZE) -> str:
+    if len(rows) <= page_size:
+        return _join(header, *rows, footer)
+    handle = _store(tool_name, header, rows)
+    return _join(header, *rows[:page_size], footer, _more_note(handle, 0, page_size, len(rows)))
+
+
+def handle_of(text: str) -> Optional[str]:
+    match = _MORE_NOTE.search(text)
+    return match.group(2) if match else None
+
+
+def handle_expires(handle: str) -> float:
+    """time.monotonic() at which the handle's result expires, 0 when it expired or was dropped already."""
+    result = _results.get(handle)
+    return result.expires if result is not None else 0.0
+
+
+def strip_more_note(text: str) -> str:
+    return _MORE_NOTE.sub(r"(\1.)", text)
+
+
+def next_page(handle: str, offset: int, limit: Optional[int] = None) -> str:
+    result = _results.get(handle.strip())
+    if result is None or result.expires <= time.monotonic():
+        return f"No stored result with handle \"{handle}\" (results expire after {RESULT_TTL // 60} minutes), run the original tool again."
+    _results.move_to_end(handle.strip())
+    limit = min(max(1, limit or PAGE_SIZE), MAX_PAGE_SIZE)
+    total = len(result.rows)
+    if offset < 0 or offset >= total:
+        return f"Offset {offset} is out of range, the {result.tool_name} result has {total} rows."
+    end = min(offset + limit, total)
+    return _join(result.header, *result.rows[offset:end], _more_note(handle, offset, end, total))
@@ -0,0 +1,126 @@
+"""
+task_feed.py pages through /api/task (or /api/task/flat) for the task tools.
+
+The task tools used to fetch /api/task?limit=500&offset=0 once, so any tenant with more than 500 tasks got silently
+truncated answers. TaskStream walks every page instead (OPSREADY_TASK_PAGE_SIZE per request) and keeps the next
+OPSREADY_TASK_PREFETCH pages in flight while the caller works through the current one, so counting and filtering start
+before the last page arrives.
+
+The methods:
+
+TaskStream(path="/api/task", params=None, limit=None):
+    async iterator over task records, `async for task in TaskStream(): ...`. params are extra query parameters as
+    (name, value) pairs; limit stops after that many records. stream.fetched / stream.pages report how much was read.
+    Each page is run through timestamps.normalize_records, and references (accounts) on /api/task/flat pages are
+    merged into the shared account directory.
+
+TaskStream.collect():
+    every record as a list.
+
+TaskStream.aclose():
+    stops early and cancels the pages still in flight.
+"""
+import asyncio
+import os
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from backend.opsready import BASE_URL, api_get
+from backend.accounts import merge_references
+from backend.timestamps import normalize_records
+
+TASK_PAGE_SIZE = int(os.getenv("OPSREADY_TASK_PAGE_SIZE", 500))
+TASK_PREFETCH = int(os.getenv("OPSREADY_TASK_PREFETCH", 2))
+
+
+def unwrap_records(payload: Any) -> List[Dict[str, Any]]:
+    """The task endpoints answer with either a plain list or a wrapper dict, return the list."""
+    if isinstance(payload, dict):
+        for key in ("items", "results", "data", "tasks"):
+            if key in payload and isinstance(payload[key], list):
+                return payload[key]
+        return []
+    return payload or []
+
+
+class TaskStream:
+    """Async iterator over every task of a task endpoint, with concurrent page prefetch."""
+
+    def __init__(
+        self,
+        path: str = "/api/task",
+        params: Optional[Sequence[Tuple[str, Any]]] = None,
+        page_size: int = TASK_PAGE_SIZE,
+        prefetch: int = TASK_PREFETCH,
+        limit: Optional[int] = None,
+    ):
+        self.url = f"{BASE_URL}{path}"
+        self.params = list(params or [])
+        self.page_size = page_size
+        self.prefetch = max(0, prefetch)
+        self.limit = limit
+        self.fetched = 0
+        self.pages = 0
+        self._next_offset = 0
+        self._pending: Deque[asyncio.Future] = deque()
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._done = False
+
+    async def _fetch_page(self, offset: int) -> List[Dict[str, Any]]:
+        params = self.params + [("limit", self.page_size), ("offset", offset)]
+        response = await api_get(self.url, params=params)
+        response.raise_for_status()
+        payload = response.json()
+        if isinstance(payload, dict):
+            merge_references(payload.get("references"))
+        return normalize_records(unwrap_records(payload))
+
+    def _schedule(self) -> None:
+        # keep the page being waited on plus `prefetch` more in flight
+        while len(self._pending) <= self.prefetch:
+            if self.limit is not None and self._next_offset >= self.limit:
+                return
+            self._pending.append(asyncio.ensure_future(self._fetch_page(self._next_offset)))
+            self._next_offset += self.page_size
+
+    def _cancel_pending(self) -> None:
+        while self._pending:
+            self._pending.popleft().cancel()
+
+    def __aiter__(self) -> "TaskStream":
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        while not self._buffer:
+            if self._done:
+                raise StopAsyncIteration
+            self._schedule()
+            if not self._pending:
+                self._done = True
+                continue
+            try:
+                page = await self._pending.popleft()
+            except BaseException:
+                await self.aclose()
+                raise
+            self.pages += 1
+            if len(page) < self.page_size:
+                # short page is the last one, anything prefetched past it is empty
+                self._done = True
+                self._cancel_pending()
+            self._buffer.extend(page)
+
+        if self.limit is not None and self.fetched >= self.limit:
+            await self.aclose()
+            raise StopAsyncIteration
+        self.fetched += 1
+        return self._buffer.popleft()
+
+    async def aclose(self) -> None:
+        """Stop early and cancel pages still in flight."""
+        self._done = True
+        self._buffer.clear()
+        self._cancel_pending()
+
+    async def collect(self) -> List[Dict[str, Any]]:
+        return [task async for task in self]
@@ -0,0 +1,158 @@
+"""
+task_index.py is the in-memory index the task tools query, built from the task snapshot.
+
+Each tool used to walk the whole task list for every question (substring matching on assignees, fromisoformat on every
+due date, a Counter over every task). TaskIndex is built once per snapshot refresh instead: hash indexes from assignee
+id / email / username / name, workspace id, priority and state to task positions, and the due timestamps in one sorted
+array, so overdue and due-soon are a bisect and a user's tasks are a dict lookup. Task records are only decoded from
+the snapshot's JSON when a query returns them.
+
+The methods:
+
+get_task_index():
+    syncs the snapshot if it is stale (see task_snapshot.py) and returns the TaskIndex for it, rebuilding the index
+    only when the snapshot changed.
+
+TaskIndex.overdue(now) / due_between(start, end) / count_due_between(start, end):
+    tasks (or how many) due in a range, earliest first.
+
+TaskIndex.for_assignee(identifier):
+    tasks of an assignee by id, or of every assignee whose email / username / name contains the text, like the user
+    tasks tool always did. An exact key is only a plain lookup when no other assignee contains the text too.
+
+TaskIndex.for_workspace(id) / for_priority(priority) / for_state(state) / category_counts(categorizer):
+    the rest of the lookups, and category counts for the summary report.
+
+TaskIndex.frame:
+    the TaskFrame (task_frame.py) of the same rows, built on first use, for counts and rollups.
+"""
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import datetime
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend.categorizer import Categorizer
+from backend.task_frame import TaskFrame
+from backend.task_snapshot import MAX_STALENESS, get_task_snapshot
+
+
+class TaskIndex:
+    def __init__(self, rows: Sequence[Tuple], version: int = 0):
+        """rows are task_snapshot.ROW_COLUMNS tuples."""
+        self.version = version
+        self._rows = rows
+        self._frame: Optional[TaskFrame] = None
+        self._data: List[str] = []
+        self._decoded: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+        self._titles: List[str] = []
+        self._by_assignee_id: Dict[str, List[int]] = defaultdict(list)
+        self._by_assignee_key: Dict[str, List[int]] = defaultdict(list)
+        self._by_workspace: Dict[str, List[int]] = defaultdict(list)
+        self._by_priority: Dict[str, List[int]] = defaultdict(list)
+        self._by_state: Dict[str, List[int]] = defaultdict(list)
+        self._category_counts: Optional[Tuple[Categorizer, Counter]] = None
+        self._matches: Dict[str, Sequence[int]] = {}
+
+        due: List[Tuple[float, int]] = []
+        for i, (_id, title, due_ts, assignee_id, name, username, email, label, workspace_id, priority, state, data) in enumerate(rows):
+            self._data.append(data)
+            self._titles.append(title or "")
+            if assignee_id:
+                self._by_assignee_id[assignee_id].append(i)
+            for key in {str(k).strip().lower() for k in (name, username, email) if k}:
+                self._by_assignee_key[key].append(i)
+            if workspace_id:
+                self._by_workspace[workspace_id].append(i)
+            if priority:
+                self._by_priority[str(priority).upper()].append(i)
+            if state:
+                self._by_state[str(state).upper()].append(i)
+            if due_ts is not None:
+                due.append((due_ts, i))
+        due.sort()
+        self._due_ts = [ts for ts, _ in due]
+        self._due_pos = [i for _, i in due]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def frame(self) -> TaskFrame:
+        if self._frame is None:
+            self._frame = TaskFrame.from_rows(self._rows)
+        return self._frame
+
+    def task(self, position: int) -> Dict[str, Any]:
+        task = self._decoded[position]
+        if task is None:
+            task = self._decoded[position] = json.loads(self._data[position])
+        return task
+
+    def _tasks(self, positions: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self.task(i) for i in positions]
+
+    def _due_range(self, start: Optional[datetime], end: Optional[datetime]) -> Tuple[int, int]:
+        lo = bisect_left(self._due_ts, int(start.timestamp())) if start else 0
+        hi = bisect_left(self._due_ts, int(end.timestamp())) if end else len(self._due_ts)
+        return lo, max(lo, hi)
+
+    def due_between(self, start: Optional[datetime], end: Optional[datetime]) -> List[Dict[str, Any]]:
+        lo, hi = self._due_range(start, end)
+        return self._tasks(self._due_pos[lo:hi])
+
+    def count_due_between(self, start: Optional[datetime], end: Optional[datetime]) -> int:
+        lo, hi = self._due_range(start, end)
+        return hi - lo
+
+    def overdue(self, now: datetime) -> List[Dict[str, Any]]:
+        return self.due_between(None, now)
+
+    def for_assignee(self, identifier: str, partial: bool = True) -> List[Dict[str, Any]]:
+        key = identifier.strip().lower()
+        if not key:
+            return []
+        positions = self._by_assignee_id.get(identifier.strip())
+        if positions is None:
+            positions = self._assignee_matches(key) if partial else self._by_assignee_key.get(key, ())
+        return self._tasks(positions)
+
+    def _assignee_matches(self, key: str) -> Sequence[int]:
+        # every assignee whose name / username / email contains the text, so "adam" still finds "Adam Wilson" even when
+        # someone is called just "adam". Scanned over the distinct assignee keys once per text and index.
+        positions = self._matches.get(key)
+        if positions is None:
+            matched_keys = [assignee_key for assignee_key in self._by_assignee_key if key in assignee_key]
+            if matched_keys == [key]:
+                positions = self._by_assignee_key[key]
+            else:
+                positions = sorted({i for assignee_key in matched_keys for i in self._by_assignee_key[assignee_key]})
+            self._matches[key] = positions
+        return positions
+
+    def for_workspace(self, workspace_id: str) -> List[Dict[str, Any]]:
+        return self._tasks(self._by_workspace.get(workspace_id, ()))
+
+    def for_priority(self, priority: str) -> List[Dict[str, Any]]:
+        return self._tasks(self._by_priority.get(priority.upper(), ()))
+
+    def for_state(self, state: str) -> List[Dict[str, Any]]:
+        return self._tasks(self._by_state.get(state.upper(), ()))
+
+    def category_counts(self, categorizer: Categorizer) -> Counter:
+        """How many task titles fall in each category, computed once per categorizer."""
+        if self._category_counts is None or self._category_counts[0] is not categorizer:
+            # only the latest categorizer is kept, a reloaded taxonomy is counted again
+            self._category_counts = (categorizer, categorizer.count(self._titles))
+        return self._category_counts[1]
+
+
+_index: Optional[TaskIndex] = None
+
+
+async def get_task_index(max_staleness: int = MAX_STALENESS) -> TaskIndex:
+    global _index
+    snapshot = await get_task_snapshot(max_staleness)
+    if _index is None or _index.version != snapshot.version:
+        _index = TaskIndex(await snapshot.rows(), snapshot.version)
+    return _index
@@ -0,0 +1,350 @@
+"""
+task_snapshot.py keeps a local SQLite copy of the tenant's tasks (plus the accounts and workspaces they point at) so the
+task tools answer from indexed local queries instead of downloading every task for every question.
+
+The first sync streams every task page into the database. After that a sync only asks /api/task for the most recently
+modified tasks (order=_modified,desc) and stops as soon as it reaches tasks older than the newest modification it has
+already stored, so only changed tasks are decoded, written and re-indexed. Deleted tasks never show up in that feed
+and the API has no id-only or deleted-since query, so finding them means paging through the whole task list: a delta
+sync does that only every DELETION_SYNC_INTERVAL seconds (OPSREADY_SNAPSHOT_DELETION_SYNC) and drops the stored tasks
+that are gone. Every FULL_SYNC_INTERVAL seconds (or when tasks carry no modification timestamp) the whole list is
+stored again, with the account and workspace directories. The database lives in the same cache directory as the form
+cache and survives restarts.
+
+sqlite3 blocks, so every database call runs in a worker thread (asyncio.to_thread), one at a time.
+
+A sync runs as one background task that every caller waiting for it shares (through asyncio.shield), so a tool call
+that times out does not cancel it: a first full sync of a large tenant can outlive several questions and still finish.
+The full sync commits every batch it writes. Once a snapshot exists, a question waits at most SYNC_WAIT seconds
+(OPSREADY_SNAPSHOT_SYNC_WAIT) for a sync and is otherwise answered from the previous snapshot.
+
+The methods:
+
+get_task_snapshot():
+    returns the process wide TaskSnapshot, synced first if it is older than MAX_STALENESS seconds
+    (OPSREADY_SNAPSHOT_MAX_STALENESS). If the sync fails or takes longer than SYNC_WAIT and an older snapshot exists,
+    the older one is used.
+
+await TaskSnapshot.rows() / version:
+    every stored task, and a counter that goes up whenever a sync changed something. task_index.py builds its in-memory
+    TaskIndex from rows() and rebuilds it when version moves; the tools query that index.
+
+await TaskSnapshot.sync(full=False):
+    runs a delta (or full) sync now, or waits for the one already running.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from backend.opsready import BASE_URL
+from backend.form_resolver import CACHE_DIR
+from backend.accounts import get_account_directory
+from backend.workspaces import get_workspace_directory
+from backend.task_feed import TaskStream
+from backend.timestamps import epoch
+
+SNAPSHOT_DB = os.getenv("OPSREADY_SNAPSHOT_DB", os.path.join(CACHE_DIR, "tasks.sqlite3"))
+MAX_STALENESS = int(os.getenv("OPSREADY_SNAPSHOT_MAX_STALENESS", 60))
+FULL_SYNC_INTERVAL = int(os.getenv("OPSREADY_SNAPSHOT_FULL_SYNC", 6 * 60 * 60))
+DELETION_SYNC_INTERVAL = int(os.getenv("OPSREADY_SNAPSHOT_DELETION_SYNC", 30 * 60))
+SYNC_WAIT = float(os.getenv("OPSREADY_SNAPSHOT_SYNC_WAIT", 5))
+DELTA_PAGE_SIZE = 100
+MODIFIED_FIELD = "_modified"
+ROW_COLUMNS = ("id", "title", "due_ts", "assignee_id", "assignee_name", "assignee_username", "assignee_email",
+               "assignee_label", "workspace_id", "priority", "state", "data")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    modified TEXT,
+    title TEXT,
+    due TEXT,
+    due_ts INTEGER,
+    assignee_id TEXT,
+    assignee_name TEXT,
+    assignee_username TEXT,
+    assignee_email TEXT,
+    assignee_label TEXT,
+    workspace_id TEXT,
+    priority TEXT,
+    state TEXT,
+    generation INTEGER,
+    data TEXT NOT NULL
+);
+DROP INDEX IF EXISTS tasks_due;
+DROP INDEX IF EXISTS tasks_assignee;
+DROP INDEX IF EXISTS tasks_workspace;
+CREATE TABLE IF NOT EXISTS accounts (id TEXT PRIMARY KEY, name TEXT, username TEXT, email TEXT, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS workspaces (id TEXT PRIMARY KEY, name TEXT, data TEXT NOT NULL);
+"""
+
+
+def _assignee(task: Dict[str, Any], accounts: Dict[str, Dict[str, Any]]) -> Tuple[Optional[str], ...]:
+    """(id, name, username, email, label) of a task's assignee, label is what the tools display."""
+    assigned = task.get("assigned_to") or task.get("assignee")
+    if isinstance(assigned, dict):
+        account_id = assigned.get("id")
+        name, username, email = assigned.get("name"), assigned.get("username"), assigned.get("email")
+    elif isinstance(assigned, str) and assigned.strip():
+        account_id, name, username, email = None, assigned.strip(), None, None
+    else:
+        # /api/task/flat style records only carry the id
+        account_id = task.get("assignee_id")
+        account = accounts.get(account_id) or {}
+        name, username, email = account.get("name"), account.get("username"), account.get("email")
+    label = (name or username or email or "").strip() or None
+    return account_id, name, username, email, label
+
+
+class TaskSnapshot:
+    def __init__(self, path: str = SNAPSHOT_DB):
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = asyncio.Lock()
+        self._sync_task: Optional[asyncio.Future] = None
+        # the connection is used from worker threads, never two at once
+        self._db_lock = threading.Lock()
+        self._accounts: Dict[str, Dict[str, Any]] = {}
+        self.version = 0
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript(SCHEMA)
+            # the snapshot is only valid for the OpsReady instance that filled it
+            if self._meta("base_url") != BASE_URL:
+                self._db.executescript("DELETE FROM tasks; DELETE FROM accounts; DELETE FROM workspaces; DELETE FROM meta;")
+                self._set_meta("base_url", BASE_URL)
+                self._db.commit()
+            for row in self._db.execute("SELECT data FROM accounts"):
+                account = json.loads(row[0])
+                self._accounts[account["id"]] = account
+        return self._db
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: Any) -> None:
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _meta_float(self, key: str) -> float:
+        try:
+            return float(self._meta(key) or 0)
+        except ValueError:
+            return 0.0
+
+    def _locked(self, fn: Callable, *args: Any) -> Any:
+        with self._db_lock:
+            return fn(*args)
+
+    async def _run(self, fn: Callable, *args: Any) -> Any:
+        """Run a database function in a worker thread, off the event loop."""
+        return await asyncio.to_thread(self._locked, fn, *args)
+
+    def _row(self, task: Dict[str, Any], generation: int) -> Tuple:
+        due = task.get("due_date") or task.get("due")
+        workspace = task.get("workspace")
+        return (
+            task.get("id"),
+            task.get(MODIFIED_FIELD),
+            task.get("title"),
+            due,
+            epoch(task, "due_date", "due"),
+            *_assignee(task, self._accounts),
+            task.get("workspace_id") or (workspace.get("id") if isinstance(workspace, dict) else None),
+            task.get("priority"),
+            task.get("state") or task.get("status"),
+            generation,
+            json.dumps(task),
+        )
+
+    def _upsert(self, tasks: Iterable[Dict[str, Any]], generation: int) -> None:
+        self.db.executemany(
+            "INSERT OR REPLACE INTO tasks (id, modified, title, due, due_ts, assignee_id, assignee_name, assignee_username,"
+            " assignee_email, assignee_label, workspace_id, priority, state, generation, data)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [self._row(task, generation) for task in tasks if task.get("id")],
+        )
+
+    async def _store_directories(self) -> None:
+        accounts = await get_account_directory().all()
+        workspaces = await get_workspace_directory().all()
+        await self._run(self._write_directories, accounts, workspaces)
+
+    def _write_directories(self, accounts: List[Dict[str, Any]], workspaces: List[Dict[str, Any]]) -> None:
+        self.db.execute("DELETE FROM accounts")
+        self.db.executemany(
+            "INSERT INTO accounts (id, name, username, email, data) VALUES (?, ?, ?, ?, ?)",
+            [(a["id"], a.get("name"), a.get("username"), a.get("email"), json.dumps(a)) for a in accounts],
+        )
+        self.db.execute("DELETE FROM workspaces")
+        self.db.executemany(
+            "INSERT INTO workspaces (id, name, data) VALUES (?, ?, ?)",
+            [(w["id"], w.get("name"), json.dumps(w)) for w in workspaces if w.get("id")],
+        )
+        self._accounts = {a["id"]: a for a in accounts}
+
+    async def _full_sync(self) -> None:
+        generation = int(await self._run(self._meta_float, "generation")) + 1
+        await self._store_directories()
+        newest = ""
+        batch: List[Dict[str, Any]] = []
+        async for task in TaskStream():
+            newest = max(newest, task.get(MODIFIED_FIELD) or "")
+            batch.append(task)
+            if len(batch) >= 500:
+                # committed as it goes, a sync that fails halfway keeps what it wrote
+                await self._run(self._write_batch, batch, generation)
+                batch = []
+        await self._run(self._finish_full_sync, batch, generation, newest)
+
+    def _write_batch(self, batch: List[Dict[str, Any]], generation: int) -> None:
+        self._upsert(batch, generation)
+        self.db.commit()
+
+    def _finish_full_sync(self, batch: List[Dict[str, Any]], generation: int, newest: str) -> None:
+        self._upsert(batch, generation)
+        # anything not seen in this pass was deleted upstream
+        self.db.execute("DELETE FROM tasks WHERE generation < ?", (generation,))
+        self._set_meta("generation", generation)
+        self._set_meta("high_water", newest)
+        self._set_meta("full_synced_at", time.time())
+        self._set_meta("pruned_at", time.time())
+
+    async def _changed_since(self, high_water: str) -> List[Dict[str, Any]]:
+        changed: List[Dict[str, Any]] = []
+        stream = TaskStream(params=[("order", f"{MODIFIED_FIELD},desc,,last")], page_size=DELTA_PAGE_SIZE, prefetch=0)
+        async for task in stream:
+            # ties with the high water mark are fetched again, upserting them twice is harmless
+            if (task.get(MODIFIED_FIELD) or "") < high_water:
+                await stream.aclose()
+                break
+            changed.append(task)
+        return changed
+
+    async def _live_ids(self) -> Set[str]:
+        return {task["id"] async for task in TaskStream() if task.get("id")}
+
+    def _needs_pruning(self) -> bool:
+        return time.time() - self._meta_float("pruned_at") >= DELETION_SYNC_INTERVAL
+
+    async def _delta_sync(self) -> int:
+        high_water = await self._run(self._meta, "high_water")
+        live: Optional[Set[str]] = None
+        if await self._run(self._needs_pruning):
+            changed_task = asyncio.ensure_future(self._changed_since(high_water))
+            live_task = asyncio.ensure_future(self._live_ids())
+            try:
+                changed, live = await asyncio.gather(changed_task, live_task)
+            except BaseException:
+                changed_task.cancel()
+                live_task.cancel()
+                raise
+        else:
+            changed = await self._changed_since(high_water)
+        newest = max([high_water] + [task.get(MODIFIED_FIELD) or "" for task in changed])
+        return await self._run(self._apply_delta, changed, live, newest)
+
+    def _apply_delta(self, changed: List[Dict[str, Any]], live: Optional[Set[str]], newest: str) -> int:
+        stored = dict(self.db.execute("SELECT id, modified FROM tasks").fetchall())
+        # the tasks tied with the high water mark come back every time, only count the ones that really changed
+        updated = [task for task in changed if task.get("id") and stored.get(task["id"]) != task.get(MODIFIED_FIELD)]
+        self._upsert(updated, int(self._meta_float("generation")))
+        self._set_meta("high_water", newest)
+        if live is None:
+            return len(updated)
+        # tasks created after the id pass read its page are in `changed`, keep them
+        fresh = {task["id"] for task in changed if task.get("id")}
+        gone = [(task_id,) for task_id in stored if task_id not in live and task_id not in fresh]
+        self.db.executemany("DELETE FROM tasks WHERE id = ?", gone)
+        self._set_meta("pruned_at", time.time())
+        return len(updated) + len(gone)
+
+    def _start_sync(self, full: bool = False) -> asyncio.Future:
+        """The running sync, or a new one. It runs as its own task, so a caller that times out does not stop it."""
+        if full or self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.ensure_future(self._sync(full))
+            self._sync_task.add_done_callback(self._sync_finished)
+        return self._sync_task
+
+    @staticmethod
+    def _sync_finished(task: asyncio.Future) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            print("Task snapshot sync failed:", task.exception())
+
+    async def sync(self, full: bool = False) -> None:
+        await asyncio.shield(self._start_sync(full))
+
+    async def _sync(self, full: bool) -> None:
+        async with self._lock:
+            await self._sync_locked(full)
+
+    def _needs_full_sync(self) -> bool:
+        return (not self._meta("high_water")
+                or time.time() - self._meta_float("full_synced_at") >= FULL_SYNC_INTERVAL)
+
+    def _commit(self) -> None:
+        self._set_meta("synced_at", time.time())
+        self.db.commit()
+
+    async def _sync_locked(self, full: bool) -> None:
+        full = full or await self._run(self._needs_full_sync)
+        try:
+            changed = 1
+            if full:
+                await self._full_sync()
+            else:
+                changed = await self._delta_sync()
+            await self._run(self._commit)
+            if changed:
+                self.version += 1
+        except BaseException:
+            # may be cancelled while a worker thread still holds the connection, wait for it
+            self._locked(self.db.rollback)
+            raise
+
+    async def synced_at(self) -> float:
+        return await self._run(self._meta_float, "synced_at")
+
+    async def ensure_fresh(self, max_staleness: int = MAX_STALENESS, wait: float = SYNC_WAIT) -> None:
+        synced_at = await self.synced_at()
+        if time.time() - synced_at < max_staleness:
+            return
+        sync = self._start_sync()
+        if not synced_at:
+            # nothing to answer from yet. A caller cancelled here (the tool timeout) leaves the sync running for the
+            # next question instead of starting over
+            await asyncio.shield(sync)
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(sync), wait)
+        except asyncio.TimeoutError:
+            print("Task snapshot sync still running, answering from the previous snapshot")
+        except Exception as e:
+            print("Task snapshot sync failed, answering from the previous snapshot", e)
+
+    # --- reads ---
+
+    async def count(self) -> int:
+        return await self._run(lambda: self.db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0])
+
+    async def rows(self) -> List[Tuple]:
+        """Every task as a ROW_COLUMNS tuple, which is what TaskIndex is built from."""
+        query = f"SELECT {', '.join(ROW_COLUMNS)} FROM tasks ORDER BY rowid"
+        return await self._run(lambda: self.db.execute(query).fetchall())
+
+
+_snapshot = TaskSnapshot()
+
+
+async def get_task_snapshot(max_staleness: int = MAX_STALENESS) -> TaskSnapshot:
+    await _snapshot.ensure_fresh(max_staleness)
+    return _snapshot
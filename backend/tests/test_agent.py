@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+from backend.agent import WRAP_UP_PROMPT, run_agent
+from backend.compaction import _blocks, compact_history
+from test_compaction import SummaryClient, assert_valid
+
+SYSTEM = "You are the OpsReady assistant."
+TOOLS = [{"name": "get_overdue_tasks", "description": "overdue tasks", "input_schema": {"type": "object", "properties": {}}}]
+
+
+class LoopingClient:
+    """A model that asks for another tool call every round, as prompt caching client and summary client."""
+
+    def __init__(self):
+        self.requests = []
+        self.messages = SummaryClient()
+        self.beta = SimpleNamespace(prompt_caching=SimpleNamespace(messages=self))
+
+    async def create(self, **request):
+        self.requests.append(request)
+        tool_use = SimpleNamespace(type="tool_use", id=f"toolu_{len(self.requests)}", name="get_overdue_tasks", input={})
+        return SimpleNamespace(content=[tool_use], stop_reason="tool_use", usage=None)
+
+
+async def overdue_tasks(name, arguments):
+    return "Overdue tasks:\n" + "- Inspect extinguishers | Due: 2024-01-01\n" * 200
+
+
+def system_text(request):
+    system = request["system"]
+    return system if isinstance(system, str) else " ".join(block["text"] for block in system)
+
+
+def test_round_cap_wraps_up_in_the_system_prompt_and_compacts_cleanly():
+    client = LoopingClient()
+    messages = [{"role": "user", "content": "show overdue tasks"}]
+
+    for question in ("and the ones for Summit Base?", "who has the most?"):
+        asyncio.run(run_agent(client, messages, SYSTEM, TOOLS, overdue_tasks, max_rounds=3))
+        messages.append({"role": "user", "content": question})
+
+    # three model calls per question, only the last one of each is told to wrap up
+    assert len(client.requests) == 6
+    assert [WRAP_UP_PROMPT in system_text(request) for request in client.requests] == [False, False, True] * 2
+    # the instruction never ends up in the conversation
+    for message in messages:
+        for block in _blocks(message):
+            if block["type"] == "text":
+                assert WRAP_UP_PROMPT not in block["text"]
+
+    asyncio.run(compact_history(client, messages, budget=200))
+    assert_valid(messages)
+    assert messages[-1] == {"role": "user", "content": "who has the most?"}
+
+
+class SlowSummaryClient(LoopingClient):
+    """Answers right away, but its history summary never comes back."""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = self
+
+    async def create(self, **request):
+        if "tools" not in request:
+            await asyncio.sleep(60)
+        self.requests.append(request)
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text="Nothing is overdue.")], stop_reason="end_turn",
+                               usage=None)
+
+
+def test_compaction_is_bounded_by_the_chat_deadline():
+    client = SlowSummaryClient()
+    messages = []
+    for question in ("show overdue tasks", "and the ones for Summit Base?", "who has the most?"):
+        messages.append({"role": "user", "content": question})
+        messages.append({"role": "assistant", "content": "Overdue tasks:\n" + "- Inspect extinguishers\n" * 2000})
+    messages.append({"role": "user", "content": "anything else?"})
+
+    async def run():
+        return await asyncio.wait_for(run_agent(client, messages, SYSTEM, TOOLS, overdue_tasks, deadline_seconds=0.2), 5)
+
+    answer = asyncio.run(run())
+    # the summary call was cut off at the deadline and the history kept as it was, the model was never asked
+    assert answer.startswith("I could not finish this answer within the time limit")
+    assert client.requests == []
+    assert messages[0] == {"role": "user", "content": "show overdue tasks"}
@@ -0,0 +1,12 @@
+from fastapi.testclient import TestClient
+
+from backend.api_server import app
+from backend.timestamps import normalize_record
+
+
+def test_health_reports_timestamp_parse_failures():
+    normalize_record({"due_date": "not a date"})
+    stats = TestClient(app).get("/api/health").json()["timestamps"]
+    assert stats["failed_by_field"]["due_date"] >= 1
+    assert ["due_date", "not a date"] in stats["failure_samples"]
+    assert {"parsed", "failed", "cache_hits", "cache_misses"} <= set(stats)
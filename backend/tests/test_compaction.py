@@ -0,0 +1,79 @@
+import asyncio
+from types import SimpleNamespace
+
+from backend.compaction import SUMMARY_PREFIX, _blocks, _turn_starts, compact_history
+
+BIG = "row " * 2000
+WRAP_UP = "This is the last step for this question: answer now using the tool results you already have."
+
+
+class SummaryClient:
+    def __init__(self):
+        self.messages = self
+        self.calls = 0
+
+    async def create(self, **request):
+        self.calls += 1
+        return SimpleNamespace(content=[SimpleNamespace(text="earlier: overdue tasks and work orders")], usage=None)
+
+
+def tool_round(tool_id, name, *extra_blocks):
+    return [
+        {"role": "assistant", "content": [{"type": "tool_use", "id": tool_id, "name": name, "input": {}}]},
+        {"role": "user", "content": [{"type": "tool_result", "tool_use_id": tool_id, "content": BIG}, *extra_blocks]},
+    ]
+
+
+def assert_valid(messages):
+    """Roles alternate from a user message and every tool_result answers a tool_use of the message before it."""
+    assert messages[0]["role"] == "user"
+    for previous, message in zip(messages, messages[1:]):
+        assert previous["role"] != message["role"]
+    for i, message in enumerate(messages):
+        for block in _blocks(message):
+            if block["type"] == "tool_result":
+                assert i > 0
+                ids = {b["id"] for b in _blocks(messages[i - 1]) if b["type"] == "tool_use"}
+                assert block["tool_use_id"] in ids
+
+
+def history_with_wrap_up_round():
+    # the second question used its last allowed round, older agents put the wrap-up note next to its tool results
+    return [
+        {"role": "user", "content": "show overdue tasks"},
+        *tool_round("toolu_1", "get_overdue_tasks"),
+        {"role": "assistant", "content": "There are 617 overdue tasks."},
+        {"role": "user", "content": "and the open work orders?"},
+        *tool_round("toolu_2", "get_work_orders"),
+        *tool_round("toolu_3", "get_deficiency_details", {"type": "text", "text": WRAP_UP}),
+        {"role": "assistant", "content": "There are 12 open work orders."},
+        {"role": "user", "content": "who has the most?"},
+    ]
+
+
+def test_tool_results_with_text_are_not_turn_starts():
+    assert _turn_starts(history_with_wrap_up_round()) == [0, 4, 10]
+
+
+def test_turn_start_right_after_a_tool_use_is_skipped():
+    messages = [
+        {"role": "user", "content": "q1"},
+        {"role": "assistant", "content": [{"type": "tool_use", "id": "toolu_1", "name": "get_work_orders", "input": {}}]},
+        {"role": "user", "content": "q2"},
+    ]
+    assert _turn_starts(messages) == [0]
+
+
+def test_compacting_a_history_with_a_wrap_up_round_keeps_it_valid():
+    messages = history_with_wrap_up_round()
+    client = SummaryClient()
+
+    saved = asyncio.run(compact_history(client, messages, budget=200))
+
+    assert saved > 0
+    assert client.calls == 1
+    assert_valid(messages)
+    first = _blocks(messages[0])
+    assert first[0]["text"].startswith(SUMMARY_PREFIX)
+    assert first[1]["text"] == "and the open work orders?"
+    assert messages[-1] == {"role": "user", "content": "who has the most?"}
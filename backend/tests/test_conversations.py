@@ -0,0 +1,18 @@
+import asyncio
+
+from backend.conversations import ConversationStore
+
+
+def test_conversations_survive_in_the_database(tmp_path):
+    path = str(tmp_path / "conversations.sqlite3")
+    messages = [{"role": "user", "content": "overdue tasks"}, {"role": "assistant", "content": "none"}]
+
+    async def run():
+        await ConversationStore(path=path).save("c1", messages)
+        store = ConversationStore(path=path)
+        assert await store.get("c1") == messages
+        assert await store.get("c2") is None
+        await store.delete("c1")
+        assert await ConversationStore(path=path).get("c1") is None
+
+    asyncio.run(run())
@@ -0,0 +1,46 @@
+import pytest
+
+from backend.intent_router import match_intent
+
+
+@pytest.mark.parametrize("message, identifier", [
+    ("tasks assigned to Adam Wilson", "Adam Wilson"),
+    ("hey, show me all tasks assigned to Sarah Johnson please?", "Sarah Johnson"),
+    ("tasks assigned to adam.wilson@example.com", "adam.wilson@example.com"),
+])
+def test_user_tasks_identifier(message, identifier):
+    assert match_intent(message).args == {"identifier": identifier}
+
+
+@pytest.mark.parametrize("message", [
+    "tasks assigned to Adam in Summit",
+    "show tasks assigned to Adam this week",
+    "tasks assigned to Adam due today",
+    "tasks assigned to the team",
+    "tasks assigned to me",
+])
+def test_user_tasks_with_more_than_a_name_goes_to_the_model(message):
+    assert match_intent(message) is None
+
+
+@pytest.mark.parametrize("message", [
+    "explain the task summary report",
+    "why are these tasks overdue",
+    "how many overdue tasks are there",
+    "compare open and closed work orders",
+    "which overdue tasks should we do first",
+    "task summary report trends",
+    "task summary report workspace",
+])
+def test_questions_about_the_data_go_to_the_model(message):
+    assert match_intent(message) is None
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("could you show me the overdue tasks?", "overdue_tasks"),
+    ("task summary report", "task_summary"),
+    ("summary report tasks", "task_summary"),
+    ("open work orders", "work_orders"),
+])
+def test_plain_requests_are_still_routed(message, intent):
+    assert match_intent(message).intent == intent
@@ -0,0 +1,21 @@
+import json
+
+from backend.task_index import TaskIndex
+
+
+def index_of(*assignees):
+    # task_snapshot.ROW_COLUMNS: id, title, due_ts, assignee_id, name, username, email, label, workspace, priority, state, data
+    rows = [
+        (f"t{i}", f"Task {i}", None, f"a{i}", name, None, email, name, "w1", None, None,
+         json.dumps({"id": f"t{i}", "assignee": name}))
+        for i, (name, email) in enumerate(assignees)
+    ]
+    return TaskIndex(rows)
+
+
+def test_for_assignee_matches_every_name_containing_the_text():
+    index = index_of(("adam", "adam@example.com"), ("Adam Wilson", "awilson@example.com"), ("Bob", "bob@example.com"))
+    assert [task["assignee"] for task in index.for_assignee("adam")] == ["adam", "Adam Wilson"]
+    assert [task["assignee"] for task in index.for_assignee("Adam Wilson")] == ["Adam Wilson"]
+    assert [task["assignee"] for task in index.for_assignee("a2")] == ["Bob"]
+    assert index.for_assignee("carol") == []
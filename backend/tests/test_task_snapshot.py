@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from backend import task_snapshot
+from backend.task_snapshot import TaskSnapshot
+
+
+class FakeDirectory:
+    async def all(self):
+        return []
+
+
+class FakeStreams:
+    """Stands in for task_feed.TaskStream over a list of tasks, counting the passes and records read."""
+
+    def __init__(self, tasks, delay=0.0):
+        self.tasks = tasks
+        self.delay = delay
+        self.passes = 0
+        self.records = 0
+
+    def __call__(self, params=None, **kwargs):
+        streams = self
+        ordered = sorted(self.tasks, key=lambda task: task["_modified"], reverse=True) if params else list(self.tasks)
+
+        class Stream:
+            def __aiter__(self):
+                return self._iterate()
+
+            async def _iterate(self):
+                streams.passes += 1
+                for task in ordered:
+                    await asyncio.sleep(streams.delay)
+                    streams.records += 1
+                    yield dict(task)
+
+            async def aclose(self):
+                pass
+
+        return Stream()
+
+
+@pytest.fixture
+def streams(monkeypatch):
+    tasks = [{"id": f"t{i}", "_modified": f"2024-01-01T00:00:{i:02d}Z", "title": f"T{i}"} for i in range(20)]
+    fake = FakeStreams(tasks)
+    monkeypatch.setattr(task_snapshot, "TaskStream", fake)
+    monkeypatch.setattr(task_snapshot, "get_account_directory", FakeDirectory)
+    monkeypatch.setattr(task_snapshot, "get_workspace_directory", FakeDirectory)
+    return fake
+
+
+def test_delta_sync_reads_the_whole_list_only_when_pruning(streams, tmp_path, monkeypatch):
+    async def run():
+        snapshot = TaskSnapshot(str(tmp_path / "tasks.sqlite3"))
+        await snapshot.sync()
+        del streams.tasks[3]
+        streams.passes = streams.records = 0
+        await snapshot.sync()
+        # the newest task (tied with the high water mark) and the older one that ends the pass, the deleted task stays
+        assert (streams.passes, streams.records) == (1, 2)
+        assert await snapshot.count() == 20
+
+        monkeypatch.setattr(task_snapshot, "DELETION_SYNC_INTERVAL", 0)
+        await snapshot.sync()
+        assert await snapshot.count() == 19
+
+    asyncio.run(run())
+
+
+def test_first_sync_outlives_a_caller_timeout(streams, tmp_path):
+    async def run():
+        snapshot = TaskSnapshot(str(tmp_path / "tasks.sqlite3"))
+        streams.delay = 0.01
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(snapshot.ensure_fresh(), 0.05)
+        await snapshot.ensure_fresh()
+        assert streams.passes == 1
+        assert await snapshot.count() == 20
+
+    asyncio.run(run())
+
+
+def test_stale_snapshot_answers_without_waiting_for_a_slow_sync(streams, tmp_path):
+    async def run():
+        snapshot = TaskSnapshot(str(tmp_path / "tasks.sqlite3"))
+        await snapshot.sync()
+        version = snapshot.version
+        streams.delay = 0.05
+        streams.tasks.append({"id": "new", "_modified": "2024-02-01T00:00:00Z", "title": "New"})
+        await snapshot.ensure_fresh(max_staleness=0, wait=0.01)
+        assert snapshot.version == version
+        await snapshot.sync()
+        assert snapshot.version == version + 1
+        assert await snapshot.count() == 21
+
+    asyncio.run(run())
@@ -0,0 +1,16 @@
+import asyncio
+
+from backend.tool_registry import REGISTRY
+
+
+def test_team_tasks_forwards_unassigned_only():
+    calls = []
+
+    async def handler(team_name, unassigned_only=False):
+        calls.append((team_name, unassigned_only))
+        return "ok"
+
+    spec = REGISTRY.get("get_team_tasks").replace_handler(handler)
+    asyncio.run(spec({"team_name": "Ops", "unassigned_only": True}))
+    asyncio.run(spec({"team_name": "Ops"}))
+    assert calls == [("Ops", True), ("Ops", False)]
@@ -0,0 +1,114 @@
+"""
+timestamps.py turns the API's ISO date strings into integer epoch seconds once, when records enter the process.
+
+The tools used to call datetime.fromisoformat(x.replace("Z", "+00:00")) inside their loops on every question and
+silently skip whatever did not parse. Records are now normalized as they are fetched (a whole page at a time by
+TaskStream and the account directory): every field in TIMESTAMP_FIELDS gets a sibling "<field>_ts" holding the epoch
+seconds (None when the value did not parse), and the original string stays where it was for display. Date comparisons
+after that are integer compares. The API repeats the same timestamps a lot (due dates especially), so parses are cached.
+
+The methods:
+
+to_epoch(value):
+    epoch seconds for an ISO string (with or without Z / offset, naive values are taken as UTC), a number or a datetime.
+    None if it cannot be parsed.
+
+normalize_records(records, fields=TIMESTAMP_FIELDS) / normalize_record(record, fields):
+    adds the "_ts" fields in place. Records that already have them are left alone.
+
+epoch(record, *fields):
+    the epoch of the first of the fields that has one, normalizing on the spot if the record was never normalized.
+
+parse_stats():
+    how many values were parsed, how many failed (per field, with a few samples) and how well the parse cache did.
+    Shown by /api/health.
+"""
+from collections import Counter, deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+TIMESTAMP_FIELDS = ("due_date", "due", "last_login", "created")
+TS_SUFFIX = "_ts"
+
+_parsed = 0
+_failures: Counter = Counter()
+_failure_samples: deque = deque(maxlen=20)
+
+
+@lru_cache(maxsize=65536)
+def _parse_iso(text: str) -> Optional[int]:
+    text = text.strip()
+    if text.endswith(("Z", "z")):
+        text = text[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def to_epoch(value: Any) -> Optional[int]:
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        return _parse_iso(value)
+    if isinstance(value, (int, float)):
+        # millisecond epochs show up in some payloads
+        return int(value / 1000) if value > 1e11 else int(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return None
+
+
+def normalize_record(record: Dict[str, Any], fields: Iterable[str] = TIMESTAMP_FIELDS) -> Dict[str, Any]:
+    global _parsed
+    for field in fields:
+        key = field + TS_SUFFIX
+        if key in record:
+            continue
+        raw = record.get(field)
+        if raw is None or raw == "":
+            continue
+        ts = record[key] = to_epoch(raw)
+        if ts is None:
+            _failures[field] += 1
+            _failure_samples.append((field, raw))
+        else:
+            _parsed += 1
+    return record
+
+
+def normalize_records(records: List[Dict[str, Any]], fields: Iterable[str] = TIMESTAMP_FIELDS) -> List[Dict[str, Any]]:
+    fields = tuple(fields)
+    for record in records:
+        if isinstance(record, dict):
+            normalize_record(record, fields)
+    return records
+
+
+def epoch(record: Dict[str, Any], *fields: str) -> Optional[int]:
+    for field in fields:
+        key = field + TS_SUFFIX
+        if key not in record:
+            normalize_record(record, (field,))
+        ts = record.get(key)
+        if ts is not None:
+            return ts
+    return None
+
+
+def parse_stats() -> Dict[str, Any]:
+    cache = _parse_iso.cache_info()
+    return {
+        "parsed": _parsed,
+        "failed": sum(_failures.values()),
+        "failed_by_field": dict(_failures),
+        "failure_samples": list(_failure_samples),
+        "cache_hits": cache.hits,
+        "cache_misses": cache.misses,
+    }
@@ -0,0 +1,207 @@
+"""
+tool_cache.py remembers tool results across chat turns.
+
+Follow-up questions make the model call the same tool with the same arguments again (get_workspace_deficiencies for
+"Summit Base" twice in three turns), and every repeat logged in and made the same 4-6 OpsReady requests. The chat
+endpoints now call tools through cached_tool_caller(), which keeps each tool's text result for a while:
+
+- the key is the tool name plus its normalized arguments: strings trimmed, names case-folded (NAME_ARGS), schema
+  defaults filled in and empty values dropped, so "summit base " and "Summit Base" are the same call.
+- every tool has its own TTL (cache_ttl in tool_registry.py, OPSREADY_TOOL_CACHE_TTL for the rest); 0 means never
+  cached.
+- the cache is bounded by the size of the kept text (MAX_BYTES, OPSREADY_TOOL_CACHE_BYTES), least recently used first
+  out, and identical calls that run at the same time share one execution.
+- only answers are kept: a result the tool reported as failed (tool_registry.tool_failed) never is. A result that ends
+  with a fetch_more handle (result_pages.py) is kept no longer than its handle works.
+- a bypass flag (the chat request's bypass_cache) runs the tool anyway and stores the fresh result, and
+  OPSREADY_TOOL_CACHE=0 turns the cache off.
+
+stats() reports hits, misses, the hit rate and how many OpsReady requests the hits saved (counted per miss with
+http_client.count_requests()); /api/health includes them.
+
+The methods:
+
+cached_tool_caller(call_tool, tools=(), bypass=False):
+    call_tool(name, input) wrapped with the cache. tools are the Claude tool definitions the defaults come from.
+
+get_tool_cache():
+    the process wide ToolResultCache (stats(), clear()).
+"""
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from backend.http_client import count_requests
+from backend.result_pages import handle_expires, handle_of
+from backend.tool_registry import REGISTRY, tool_failed
+
+CACHE_ENABLED = os.getenv("OPSREADY_TOOL_CACHE", "1") != "0"
+DEFAULT_TTL = float(os.getenv("OPSREADY_TOOL_CACHE_TTL", 120))
+MAX_BYTES = int(os.getenv("OPSREADY_TOOL_CACHE_BYTES", 8 * 1024 * 1024))
+
+# arguments that are names typed by the user, compared without case
+NAME_ARGS = {"workspace_name", "team_name", "identifier", "status"}
+
+ToolCaller = Callable[[str, Dict[str, Any]], Awaitable[str]]
+CacheKey = Tuple[str, str]
+
+
+class CachedResult(NamedTuple):
+    text: str
+    expires: float
+    upstream_requests: int
+    handle: Optional[str]
+
+
+def _defaults(tools: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    defaults = {}
+    for tool in tools:
+        properties = tool.get("input_schema", {}).get("properties", {})
+        defaults[tool["name"]] = {name: spec["default"] for name, spec in properties.items() if "default" in spec}
+    return defaults
+
+
+def normalize_args(tool_input: Dict[str, Any], defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    normalized = dict(defaults or {})
+    for name, value in tool_input.items():
+        if isinstance(value, str):
+            value = " ".join(value.split())
+            if name in NAME_ARGS:
+                value = value.casefold()
+        normalized[name] = value
+    return {name: value for name, value in normalized.items() if value not in (None, "")}
+
+
+class ToolResultCache:
+    def __init__(self, max_bytes: int = MAX_BYTES, default_ttl: float = DEFAULT_TTL):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[CacheKey, CachedResult]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.saved_requests = 0
+
+    def ttl(self, tool_name: str) -> float:
+        return REGISTRY.cache_ttl(tool_name, self.default_ttl)
+
+    def _lookup(self, key: CacheKey) -> Optional[CachedResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        # the fetch_more handle in the text can be dropped before its TTL when result_pages is full
+        if entry.expires <= now or (entry.handle and handle_expires(entry.handle) <= now):
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _drop(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        self.bytes -= len(entry.text.encode())
+
+    def _store(self, key: CacheKey, entry: CachedResult) -> None:
+        size = len(entry.text.encode())
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = entry
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def call(self, call_tool: ToolCaller, tool_name: str, tool_input: Dict[str, Any],
+                   defaults: Optional[Dict[str, Any]] = None, bypass: bool = False) -> str:
+        ttl = self.ttl(tool_name)
+        if not CACHE_ENABLED or ttl <= 0:
+            return await call_tool(tool_name, tool_input)
+
+        key = (tool_name, json.dumps(normalize_args(tool_input, defaults), sort_keys=True, default=str))
+        if bypass:
+            self.bypassed += 1
+        else:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+                self.saved_requests += entry.upstream_requests
+                return entry.text
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                # the same call is already running for another tool_use block or chat, wait for its result
+                try:
+                    text = await asyncio.shield(inflight)
+                    self.hits += 1
+                    return text
+                except asyncio.CancelledError:
+                    if not inflight.cancelled():
+                        raise
+                    # the chat that started it went away, run it here instead
+            self.misses += 1
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            with count_requests() as requests:
+                text = await call_tool(tool_name, tool_input)
+            if not tool_failed(text):
+                expires = time.monotonic() + ttl
+                handle = handle_of(text)
+                if handle:
+                    expires = min(expires, handle_expires(handle))
+                self._store(key, CachedResult(text, expires, requests.count, handle))
+            future.set_result(text)
+            return text
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # nobody else may be waiting, don't let asyncio warn about an unretrieved exception
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": CACHE_ENABLED,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "saved_upstream_requests": self.saved_requests,
+        }
+
+
+_cache = ToolResultCache()
+
+
+def get_tool_cache() -> ToolResultCache:
+    return _cache
+
+
+def cached_tool_caller(call_tool: ToolCaller, tools: Iterable[Dict[str, Any]] = (), bypass: bool = False) -> ToolCaller:
+    defaults = _defaults(tools)
+
+    async def call(tool_name: str, tool_input: Dict[str, Any]) -> str:
+        return await _cache.call(call_tool, tool_name, tool_input, defaults.get(tool_name), bypass)
+
+    return call
@@ -0,0 +1,322 @@
+"""
+tool_registry.py is the one list of chat tools: schema, handler, timeout and cache policy for each.
+
+The tools used to be declared three times: the TOOLS list and an if/elif chain in api_server.py, list_tools /
+call_tool in server.py (which had drifted: get_task_assignee there ignored unassigned_only, get_activity_feed advertised
+an argument it does not take, and get_assigned_tasks had no handler at all), and another list in the mock server
+main.py. Every tool is now a ToolSpec in REGISTRY, and the three entry points generate what they need from it:
+
+- api_server.py: REGISTRY.claude_tools() for the Claude API and REGISTRY.call_text() as the tool caller.
+- server.py: REGISTRY.mcp_tools() for list_tools and REGISTRY.call() for call_tool.
+- main.py: REGISTRY.with_handlers({...}) swaps in the mock functions for the tools it fakes.
+
+Dispatch is a dict lookup. Handlers are named as "module:function" and imported on their first call, so building the
+registry (and the mock server) does not import every tool. A spec's timeout is used by agent.run_tools and its
+cache_ttl by tool_cache.py; None means their defaults.
+
+The methods:
+
+REGISTRY.claude_tools() / REGISTRY.mcp_tools():
+    the tool definitions for the Claude API / the MCP server.
+
+REGISTRY.call(name, arguments):
+    runs the tool's handler with the arguments (schema defaults filled in) and returns what it returns.
+
+REGISTRY.call_text(name, arguments):
+    the same, as the text the chat agent sends back to the model. Errors are returned as text, not raised, and the
+    text's `failed` is True (tool_failed(text)) so the cache and the agent never mistake them for answers.
+
+tool_error(text):
+    what a tool returns when it could not answer, instead of a plain TextContent list with the error message.
+
+tool_no_match(text):
+    what a lookup tool returns when it worked but nothing matched what it was asked for (tool_matched_nothing(text)
+    on the call_text result). The intent router then lets the model answer instead, it may have misread the question.
+
+REGISTRY.timeout(name, default) / REGISTRY.cache_ttl(name, default):
+    the tool's policies.
+"""
+import importlib
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+Handler = Callable[..., Awaitable[Any]]
+
+
+class ToolSpec:
+    def __init__(self, name: str, description: str, handler: Union[str, Handler],
+                 properties: Optional[Dict[str, Dict[str, Any]]] = None, required: Sequence[str] = (),
+                 timeout: Optional[float] = None, cache_ttl: Optional[float] = None):
+        self.name = name
+        self.description = description
+        self.properties = properties or {}
+        self.required = list(required)
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self._handler = handler
+
+    @property
+    def input_schema(self) -> Dict[str, Any]:
+        schema: Dict[str, Any] = {"type": "object", "properties": self.properties}
+        if self.required:
+            schema["required"] = self.required
+        return schema
+
+    @property
+    def defaults(self) -> Dict[str, Any]:
+        return {name: spec["default"] for name, spec in self.properties.items() if "default" in spec}
+
+    @property
+    def handler(self) -> Handler:
+        if isinstance(self._handler, str):
+            module, function = self._handler.split(":")
+            self._handler = getattr(importlib.import_module(module), function)
+        return self._handler
+
+    def replace_handler(self, handler: Handler) -> "ToolSpec":
+        return ToolSpec(self.name, self.description, handler, self.properties, self.required,
+                        self.timeout, self.cache_ttl)
+
+    async def __call__(self, arguments: Dict[str, Any]) -> Any:
+        # only the declared arguments, so a stray one from the model can not break the call
+        kwargs = {**self.defaults, **{k: v for k, v in arguments.items() if k in self.properties}}
+        return await self.handler(**kwargs)
+
+
+class ToolFailure(list):
+    """The TextContent list of a tool that could not answer (see tool_error)."""
+
+
+class ToolNoMatch(list):
+    """The TextContent list of a lookup that found nothing (see tool_no_match)."""
+
+
+class ToolText(str):
+    """Text result of REGISTRY.call_text, failed is True when the tool did not produce an answer."""
+    failed = False
+    no_match = False
+
+
+def tool_error(text: str) -> ToolFailure:
+    from mcp.types import TextContent
+
+    return ToolFailure([TextContent(type="text", text=text)])
+
+
+def tool_no_match(text: str) -> ToolNoMatch:
+    from mcp.types import TextContent
+
+    return ToolNoMatch([TextContent(type="text", text=text)])
+
+
+def tool_failed(text: Any) -> bool:
+    return getattr(text, "failed", False)
+
+
+def tool_matched_nothing(text: Any) -> bool:
+    return getattr(text, "no_match", False)
+
+
+def _failed(text: str) -> ToolText:
+    text = ToolText(text)
+    text.failed = True
+    return text
+
+
+def _text(result: Any) -> ToolText:
+    # tools return lists of MCP TextContent, the mock tools plain strings
+    if isinstance(result, list):
+        text = ToolText("\n".join(item.text for item in result if hasattr(item, "text")))
+    else:
+        text = ToolText(result)
+    text.failed = isinstance(result, ToolFailure)
+    text.no_match = isinstance(result, ToolNoMatch)
+    return text
+
+
+class ToolRegistry:
+    def __init__(self, specs: Iterable[ToolSpec]):
+        self._specs: Dict[str, ToolSpec] = {spec.name: spec for spec in specs}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def get(self, name: str) -> Optional[ToolSpec]:
+        return self._specs.get(name)
+
+    def claude_tools(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": spec.name, "description": spec.description, "input_schema": spec.input_schema}
+            for spec in self._specs.values()
+        ]
+
+    def mcp_tools(self) -> list:
+        from mcp.types import Tool
+
+        return [
+            Tool(name=spec.name, description=spec.description, inputSchema=spec.input_schema)
+            for spec in self._specs.values()
+        ]
+
+    async def call(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        spec = self._specs.get(name)
+        if spec is None:
+            raise KeyError(f"Unknown tool: {name}")
+        return await spec(arguments or {})
+
+    async def call_text(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> ToolText:
+        """Execute the tool and return its output as text"""
+        if name not in self._specs:
+            return _failed(f"Unknown tool: {name}")
+        try:
+            return _text(await self.call(name, arguments))
+        except Exception as e:
+            return _failed(f"Error executing {name}: {str(e)}")
+
+    def timeout(self, name: str, default: float) -> float:
+        spec = self._specs.get(name)
+        return spec.timeout if spec is not None and spec.timeout is not None else default
+
+    def cache_ttl(self, name: str, default: float) -> float:
+        spec = self._specs.get(name)
+        return spec.cache_ttl if spec is not None and spec.cache_ttl is not None else default
+
+    def with_handlers(self, handlers: Dict[str, Handler]) -> "ToolRegistry":
+        """A registry of just these tools, same schemas and policies, other handlers (the mock server)."""
+        return ToolRegistry(self._specs[name].replace_handler(handler) for name, handler in handlers.items())
+
+
+def _string(description: str) -> Dict[str, Any]:
+    return {"type": "string", "description": description}
+
+
+REGISTRY = ToolRegistry([
+    ToolSpec(
+        "get_recent_logins",
+        "Returns users who have logged in since a certain date (YYYY-MM-DD)",
+        "backend.tools.tool_recent_logins:get_recent_logins",
+        {"since_date": _string("Date in YYYY-MM-DD format")}, required=["since_date"],
+        cache_ttl=300,
+    ),
+    ToolSpec(
+        "get_user_tasks",
+        "Get all tasks assigned to a specific user by name, username, or email",
+        "backend.tools.tool_get_user_tasks:get_user_tasks",
+        {"identifier": _string("Name, username, or email of the user")}, required=["identifier"],
+        cache_ttl=60,
+    ),
+    ToolSpec(
+        "get_task_sample",
+        "Return a small sample of tasks with basic fields for debugging",
+        "backend.tools.tool_debug_tasks_sample:get_task_sample",
+        {"limit": {"type": "integer", "description": "How many tasks to show (default 5)", "default": 5}},
+        cache_ttl=60,
+    ),
+    ToolSpec(
+        "get_all_assigned_users",
+        "List all users who currently have one or more tasks assigned, with task counts",
+        "backend.tools.tool_get_all_assigned_users:get_all_assigned_users",
+        cache_ttl=60,
+    ),
+    ToolSpec(
+        "get_overdue_tasks",
+        "List all tasks whose due date is before today (UTC)",
+        "backend.tools.tool_get_overdue_tasks:get_overdue_tasks",
+        cache_ttl=60,
+    ),
+    ToolSpec(
+        "get_task_summary_report",
+        "Generate a summary report of all OpsReady tasks: total, assigned/unassigned, overdue, due soon, and category breakdown",
+        "backend.tools.tool_get_task_summary_report:get_task_summary_report",
+        cache_ttl=60,
+    ),
+    ToolSpec(
+        "get_task_assignee",
+        "Retrieves task information from a given workspace. If the user asks for unassigned tasks, returns only those with no assignee",
+        "backend.tools.tool_task_asignee:get_task_assignee",
+        {
+            "workspace_name": _string("The name of the workspace to get tasks from"),
+            "unassigned_only": {
+                "type": "boolean",
+                "description": "If true, returns only tasks without an assigned user",
+                "default": False,
+            },
+        },
+        required=["workspace_name"],
+        cache_ttl=60,
+    ),
+    ToolSpec(
+        "get_team_tasks",
+        "Get the tasks that are assigned to a team. If the user asks for unassigned tasks, returns only those with no assignee",
+        "backend.tools.tool_teams_tasks:get_team_tasks",
+        {
+            "team_name": _string("The name of the team to get tasks from"),
+            "unassigned_only": {
+                "type": "boolean",
+                "description": "If true, returns only tasks without an assigned user",
+                "default": False,
+            },
+        },
+        required=["team_name"],
+        cache_ttl=60,
+    ),
+    ToolSpec(
+        "get_activity_feed",
+        "Returns the most active users in a workspace, who has submitted forms, and recent activity",
+        "backend.tools.tool_activity_feed:get_activity_feed",
+        {"workspace_name": _string("Name of the workspace")}, required=["workspace_name"],
+        timeout=45, cache_ttl=60,
+    ),
+    ToolSpec(
+        "get_workspace_forms",
+        "Returns all available forms (and their IDs) for a specific OpsReady workspace",
+        "backend.tools.tool_list_forms:get_workspace_forms_tool",
+        {"workspace_name": _string("The name of the OpsReady workspace (e.g., 'Summit Base')")},
+        required=["workspace_name"],
+        cache_ttl=600,
+    ),
+    ToolSpec(
+        "get_workspace_deficiencies",
+        "Fetches all deficiencies for a given workspace and lists their status",
+        "backend.tools.tool_get_asset_deficiencies:get_asset_deficiencies",
+        {"workspace_name": _string("The name of the workspace to fetch deficiencies for")},
+        required=["workspace_name"],
+        timeout=45, cache_ttl=300,
+    ),
+    ToolSpec(
+        "get_deficiency_details",
+        "Fetches all details about a given deficiency, including task and work order info",
+        "backend.tools.get_deficiency_details:get_deficiency_details",
+        {"deficiency_id": _string("The deficiency ID")}, required=["deficiency_id"],
+        timeout=45, cache_ttl=300,
+    ),
+    ToolSpec(
+        "get_work_orders",
+        "Get work orders with optional status filter",
+        "backend.tools.tool_work_orders:get_work_orders",
+        {"status": _string("Status of work orders to filter by (e.g., 'Open', 'Closed')")},
+        cache_ttl=120,
+    ),
+    ToolSpec(
+        "get_assets",
+        "Fetches all assets from a workspace",
+        "backend.tools.tool_get_assets:get_assets",
+        {"workspace_name": _string("The workspace name")}, required=["workspace_name"],
+        cache_ttl=600,
+    ),
+    ToolSpec(
+        "fetch_more",
+        "Get the next page of a long tool result. Use the handle and offset given at the end of the previous page",
+        "backend.tools.tool_fetch_more:fetch_more",
+        {
+            "handle": _string("The result handle from the previous page"),
+            "offset": {"type": "integer", "description": "Index of the first row to return"},
+            "limit": {"type": "integer", "description": "How many rows to return (default 25, at most 100)"},
+        },
+        required=["handle", "offset"],
+        # pages of a stored result are already in memory
+        timeout=5, cache_ttl=0,
+    ),
+])
@@ -3,7 +3,7 @@ from typing import List
 
 from dotenv import load_dotenv
 from mcp.types import TextContent
-from backend.opsready import get_tgt, get_st, get_api_session
+from backend.opsready import api_get
 
 """
 Working, need to add way to map creator_id to actual users name
@@ -22,16 +22,7 @@ async def get_activity_feed(workspace_name: str) -> List[TextContent]:
 
 #authenticate
     try:
-        tgt = get_tgt(USERNAME, PASSWORD)
-        if not tgt:
-            print("failed to get TGT")
-            return [TextContent(type="text", text="Failed to get TGT")]
-
-        service_url = f"{BASE_URL}/api/login"
-        st = get_st(tgt, service_url)
-        session = get_api_session(st)
-
-        response = session.get(all_ws_url)
+        response = await api_get(all_ws_url)
         response.raise_for_status()
         data = response.json()
 
@@ -51,7 +42,7 @@ async def get_activity_feed(workspace_name: str) -> List[TextContent]:
             "&categories=chat&categories=data&categories=details"
         )
 
-        activity_response = session.get(activity_feed_url)
+        activity_response = await api_get(activity_feed_url)
         activity_response.raise_for_status()
         data = activity_response.json()
 
@@ -70,7 +61,7 @@ async def get_activity_feed(workspace_name: str) -> List[TextContent]:
 
 
         '''users_name_url = f"{BASE_URL}/api/workspace/{workspace_id}/accounts?access_type=all"
-        users_response = session.get(users_name_url)
+        users_response = await api_get(users_name_url)
         users_response.raise_for_status()
         users_data = users_response.json()'''
 
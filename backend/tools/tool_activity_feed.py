@@ -6,43 +6,22 @@ Returns the activity in that workspace, forms submitted, incidents submitted etc
 import os
 from typing import List
 
-from dotenv import load_dotenv
 from mcp.types import TextContent
-from backend.opsready import get_tgt, get_st, get_api_session
+from backend.tool_registry import tool_error
+from backend.opsready import api_get
+from backend.workspaces import find_workspace_id
+from backend.accounts import display_name, merge_references
 
-load_dotenv()
 BASE_URL = "https://or-student-sandbox.opsready.com"
 USERNAME = os.getenv("OPSREADY_USERNAME")
 PASSWORD = os.getenv("OPSREADY_PASSWORD")
 
 async def get_activity_feed(workspace_name: str) -> List[TextContent]:
-#url to get all the workstations
-    all_ws_url = f"{BASE_URL}/api/workspace?limit=50&offset=0&archived=false&order=_created,desc,,last&hidden=false"
-
-#authenticate
     try:
-        tgt = get_tgt(USERNAME, PASSWORD)
-        if not tgt:
-            print("failed to get TGT")
-            return [TextContent(type="text", text="Failed to get TGT")]
-
-        service_url = f"{BASE_URL}/api/login"
-        st = get_st(tgt, service_url)
-        session = get_api_session(st)
-# end auth
-        #get sessions and get workstations
-        response = session.get(all_ws_url)
-        response.raise_for_status()
-        data = response.json()
-
-#loop through all the ws gotten from above, find the is that matches the param, store in val
-        workspace_id= None
-        for ws in data:
-            if ws.get("name", "").lower() == workspace_name.lower():
-                workspace_id = ws.get("id")
-                break
+#look up the workspace id in the shared workspace directory (shared session handles auth)
+        workspace_id = await find_workspace_id(workspace_name)
         if not workspace_id:
-            return [TextContent(type="text", text="Failed to get workspace with that name")]
+            return tool_error("Failed to get workspace with that name")
 
 
 #get the activity feed for the user requested workspace sent through param
@@ -53,7 +32,7 @@ async def get_activity_feed(workspace_name: str) -> List[TextContent]:
         )
 
 #get response data from the activity feed api
-        activity_response = session.get(activity_feed_url)
+        activity_response = await api_get(activity_feed_url)
         activity_response.raise_for_status()
         data = activity_response.json()
 
@@ -64,12 +43,10 @@ async def get_activity_feed(workspace_name: str) -> List[TextContent]:
 #get specific responses that we want and store them in variables
         activities_list = data.get("results", [])
         references = data.get("references", {})
-        accounts = references.get("accounts", {})
-        accounts_list = data.get("accounts", [])
         forms = references.get("forms", {})
 
-        #map
-        user_map = {acc_id: acc_data.get("name") for acc_id, acc_data in accounts.items()}
+        #account names go into the shared account directory, forms are mapped here
+        merge_references(references)
         form_map = {form_id: form_data.get("name") for form_id, form_data in forms.items()}
 
 
@@ -81,7 +58,7 @@ async def get_activity_feed(workspace_name: str) -> List[TextContent]:
             form_id = d.get("form_id")
             feature_action = d.get("feature_action")
 
-            creator_name = user_map.get(creator_id, creator_id)
+            creator_name = await display_name(creator_id, creator_id)
 
             form_name = form_map.get(form_id, "Unknown Form")
 
@@ -102,7 +79,7 @@ async def get_activity_feed(workspace_name: str) -> List[TextContent]:
         return [TextContent(type="text", text=output)]
 
     except Exception as e:
-        return [TextContent(type="text", text=f" Error: {e}")]
+        return tool_error(f"Error: {e}")
 
 
 
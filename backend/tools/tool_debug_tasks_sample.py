@@ -1,12 +1,11 @@
 # tools/tool_debug_tasks_sample.py
 
 from mcp.types import TextContent
+from backend.tool_registry import tool_error
 from typing import List
 import os
-from dotenv import load_dotenv
-from backend.opsready import get_tgt, get_st, get_api_session
+from backend.task_feed import TaskStream
 
-load_dotenv()
 
 BASE_URL = os.getenv("BASE_URL", "https://or-student-sandbox.opsready.com")
 USERNAME = os.getenv("OPSREADY_USERNAME")
@@ -20,45 +19,19 @@ async def get_task_sample(limit: int = 5) -> List[TextContent]:
     """
 
     try:
-        # Step 1: Authenticate (same CAS flow as your working tools)
-        tgt = get_tgt(USERNAME, PASSWORD)
-        if not tgt:
-            return [TextContent(type="text", text="Failed to get TGT (check .env).")]
-
-        service_url = f"{BASE_URL}/api/login"
-        st = get_st(tgt, service_url)
-        if not st:
-            return [TextContent(type="text", text="Failed to get ST for /api/login.")]
-
-        session = get_api_session(st)
-
-        # Step 2: Fetch tasks
-        resp = session.get(f"{BASE_URL}/api/task?limit={limit}&offset=0")
-        if resp.status_code == 401:
-            # Retry once if session cookie expired
-            st = get_st(tgt, service_url)
-            session = get_api_session(st)
-            resp = session.get(f"{BASE_URL}/api/task?limit={limit}&offset=0")
-
-        resp.raise_for_status()
-        data = resp.json()
+        # Step 1: Read just the first `limit` tasks (shared session re-authenticates on 401)
+        limit = max(1, limit)
+        tasks = await TaskStream(page_size=limit, prefetch=0, limit=limit).collect()
 
     except Exception as e:
-        return [TextContent(type="text", text=f"Error fetching tasks: {e}")]
-
-    # Step 3: Normalize payload
-    tasks = data
-    if isinstance(tasks, dict):
-        for key in ("items", "results", "data", "tasks"):
-            if key in tasks and isinstance(tasks[key], list):
-                tasks = tasks[key]
-                break
+        return tool_error(f"Error fetching tasks: {e}")
 
     if not tasks:
         return [TextContent(type="text", text="No tasks found in the system.")]
 
-    # Step 4: Build readable summary
-    lines = [f"Showing up to {limit} tasks (out of {len(tasks)} available):"]
+    # Step 2: Build readable summary
+    # only `limit` tasks are read, so there is no total to report here
+    lines = [f"Showing {len(tasks)} task(s) (sample limit {limit}):"]
     for i, t in enumerate(tasks[:limit]):
         title = t.get("title", "<Untitled Task>")
         assigned = (
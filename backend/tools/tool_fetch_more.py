@@ -0,0 +1,15 @@
+"""
+Tool that returns the next page of a long tool result ("show me the rest of the overdue tasks")
+The first page of the result ends with the handle and offset to ask for, see backend/result_pages.py
+"""
+from typing import List, Optional
+from mcp.types import TextContent
+from backend.tool_registry import tool_error
+from backend.result_pages import next_page
+
+
+async def fetch_more(handle: str, offset: int, limit: Optional[int] = None) -> List[TextContent]:
+    try:
+        return [TextContent(type="text", text=next_page(handle, int(offset), limit))]
+    except Exception as e:
+        return tool_error(f"Error: {e}")
@@ -1,14 +1,14 @@
 # tools/tool_get_task_summary_report.py
 
 from mcp.types import TextContent
+from backend.tool_registry import tool_error
 from typing import List
 import os
 from datetime import datetime, timezone, timedelta
-from dotenv import load_dotenv
-from collections import Counter
-from backend.opsready import get_tgt, get_st, get_api_session
+from backend.task_index import get_task_index
+from backend.categorizer import get_categorizer
+from backend.workspaces import get_workspace_directory
 
-load_dotenv()
 
 BASE_URL = os.getenv("BASE_URL", "https://or-student-sandbox.opsready.com")
 USERNAME = os.getenv("OPSREADY_USERNAME")
@@ -20,84 +20,36 @@ async def get_task_summary_report() -> List[TextContent]:
     Produces a high-level summary of OpsReady tasks:
     - total, assigned, unassigned
     - overdue and due soon
-    - most common categories (based on title keywords)
+    - tasks per priority and the workspaces with the most overdue tasks
+    - most common categories (title terms from the task taxonomy)
     """
 
-    try:
-        # --- Step 1: Authenticate ---
-        tgt = get_tgt(USERNAME, PASSWORD)
-        if not tgt:
-            return [TextContent(type="text", text="Failed to obtain TGT (check .env).")]
-
-        service_url = f"{BASE_URL}/api/login"
-        st = get_st(tgt, service_url)
-        if not st:
-            return [TextContent(type="text", text="Failed to obtain ST for /api/login service.")]
-
-        session = get_api_session(st)
-
-        # --- Step 2: Fetch all tasks ---
-        resp = session.get(f"{BASE_URL}/api/task?limit=500&offset=0")
-        if resp.status_code == 401:
-            # Retry once
-            st = get_st(tgt, service_url)
-            session = get_api_session(st)
-            resp = session.get(f"{BASE_URL}/api/task?limit=500&offset=0")
+    # --- Step 1: compute metrics from the task index and its columnar frame (shared session handles auth when the snapshot syncs) ---
+    now = datetime.now(timezone.utc)
+    due_soon_threshold = now + timedelta(days=7)
 
-        resp.raise_for_status()
-        tasks = resp.json()
+    try:
+        index = await get_task_index()
 
     except Exception as e:
-        return [TextContent(type="text", text=f"Authentication or fetch error: {e}")]
+        return tool_error(f"Authentication or fetch error: {e}")
 
-    if not tasks:
+    if not len(index):
         return [TextContent(type="text", text="No tasks found in the system.")]
 
-    # --- Step 3: unwrap payload if wrapped ---
-    if isinstance(tasks, dict):
-        for key in ("items", "results", "data", "tasks"):
-            if key in tasks and isinstance(tasks[key], list):
-                tasks = tasks[key]
-                break
-
-    # --- Step 4: compute metrics ---
-    now = datetime.now(timezone.utc)
-    due_soon_threshold = now + timedelta(days=7)
-
-    total = len(tasks)
-    assigned = 0
-    unassigned = 0
-    overdue = 0
-    due_soon = 0
-    categories = Counter()
-
-    for t in tasks:
-        # assignment
-        a = t.get("assigned_to") or t.get("assignee")
-        if a:
-            assigned += 1
-        else:
-            unassigned += 1
-
-        # due-date
-        due_raw = t.get("due_date") or t.get("due")
-        if due_raw:
-            try:
-                due = datetime.fromisoformat(due_raw.replace("Z", "+00:00"))
-                if due < now:
-                    overdue += 1
-                elif due < due_soon_threshold:
-                    due_soon += 1
-            except Exception:
-                pass
-
-        # category from title keywords
-        title = t.get("title", "").lower()
-        for keyword in ["inspection", "report", "hazard", "incident", "operation", "follow-up", "check", "request"]:
-            if keyword in title:
-                categories[keyword] += 1
-
-    # --- Step 5: format report ---
+    frame = index.frame
+    totals = frame.totals(now, due_soon_threshold)
+    total = totals["total"]
+    assigned = totals["assigned"]
+    unassigned = totals["unassigned"]
+    overdue = totals["overdue"]
+    due_soon = totals["due_soon"]
+    priorities = frame.priority_counts()
+    late_workspaces = [ws for ws in frame.workspace_breakdown(now, due_soon_threshold)[:5] if ws["overdue"]]
+    # categories come from the taxonomy file (backend/task_categories.json)
+    categories = index.category_counts(get_categorizer())
+
+    # --- Step 2: format report ---
     lines = [
         f"📊 OpsReady Task Summary Report — {now.strftime('%Y-%m-%d %H:%M UTC')}\n",
         f"Total tasks: {total}",
@@ -107,10 +59,28 @@ async def get_task_summary_report() -> List[TextContent]:
         f"Due soon (next 7 days): {due_soon}\n",
     ]
 
+    if priorities:
+        lines.append("Tasks by priority:")
+        for priority, count in priorities:
+            lines.append(f"- {priority.title()}: {count}")
+        lines.append("")
+
+    if late_workspaces:
+        lines.append("Workspaces with the most overdue tasks:")
+        directory = get_workspace_directory()
+        for ws in late_workspaces:
+            try:
+                workspace = await directory.get(ws["workspace_id"])
+            except Exception:
+                workspace = None
+            name = workspace.get("name") if workspace else ws["workspace_id"]
+            lines.append(f"- {name}: {ws['overdue']} overdue of {ws['total']} ({ws['unassigned']} unassigned)")
+        lines.append("")
+
     if categories:
         lines.append("Top task categories:")
         for k, v in categories.most_common(10):
-            lines.append(f"- {k.title()}: {v}")
+            lines.append(f"- {k}: {v}")
 
     lines.append("\nKey insights:")
     if unassigned > assigned:
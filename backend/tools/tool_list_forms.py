@@ -1,10 +1,11 @@
-import requests
+import httpx
 from typing import Dict, List, Optional
 import os
-from dotenv import load_dotenv
 from mcp.types import TextContent  # Assuming mcp.types is available for this environment
+from backend.tool_registry import tool_error
 # Ensure this import path matches your project structure:
-from backend.opsready import get_tgt, get_st, get_api_session
+from backend.opsready import api_get
+from backend.workspaces import find_workspace
 
 """
 This file is a tool called get_workspace_forms, it has a function 
@@ -14,36 +15,20 @@ return a list of its available forms. THE API URL FOR ACCESSING THE ASSETS USES
 """
 
 # --- CONFIGURATION ---
-load_dotenv()
 BASE_URL = "https://or-student-sandbox.opsready.com"
 USERNAME = os.getenv("OPSREADY_USERNAME")
 PASSWORD = os.getenv("OPSREADY_PASSWORD")
 
 # --- INTERNAL HELPER FUNCTIONS ---
 
-def _find_workspace(session: requests.Session, workspace_name: str) -> Optional[Dict]:
-    """Internal function to find the target workspace using the active session."""
-    url = f"{BASE_URL}/api/workspace?limit=50&offset=0&archived=false&order=_created,desc,,last&hidden=false"
-
+async def _find_workspace(workspace_name: str) -> Optional[Dict]:
+    """Internal function to find the target workspace (exact name first, then partial) in the shared directory."""
     try:
-        response = session.get(url)
-        response.raise_for_status()
-        data = response.json()
-    except requests.exceptions.RequestException:
+        return await find_workspace(workspace_name, partial=True)
+    except httpx.HTTPError:
         return None
 
-    workspaces_list: List[Dict] = data
-    name_to_find = workspace_name.strip().lower()
-
-    # Find the first matching workspace
-    matching_workspaces = [
-        ws for ws in workspaces_list
-        if ws.get("name") and name_to_find in ws.get("name").strip().lower()
-    ]
-
-    return matching_workspaces[0] if matching_workspaces else None
-
-def _fetch_forms(session: requests.Session, workspace_id: str) -> List[Dict]:
+async def _fetch_forms(workspace_id: str) -> List[Dict]:
     """Internal function to fetch the forms list for a given workspace ID."""
     url = (
         f"{BASE_URL}/api/workspace/{workspace_id}/form"
@@ -51,7 +36,7 @@ def _fetch_forms(session: requests.Session, workspace_id: str) -> List[Dict]:
     )
 
     try:
-        response = session.get(url)
+        response = await api_get(url)
         response.raise_for_status()
 
         forms_data = response.json()
@@ -68,7 +53,7 @@ def _fetch_forms(session: requests.Session, workspace_id: str) -> List[Dict]:
 
         return forms_list
 
-    except requests.exceptions.RequestException:
+    except httpx.HTTPError:
         return []
 
 
@@ -81,23 +66,11 @@ async def get_workspace_forms_tool(workspace_name: str) -> list[TextContent]:
     """
 
     if not workspace_name:
-        return [TextContent(type="text", text="Workspace name cannot be empty.")]
+        return tool_error("Workspace name cannot be empty.")
 
     try:
-        # 1. AUTHENTICATION
-        tgt = get_tgt(USERNAME, PASSWORD)
-        if not tgt:
-            return [TextContent(type="text", text="Failed to get TGT. Check credentials.")]
-
-        service_url = f"{BASE_URL}/api/login"
-        st = get_st(tgt, service_url)
-        if not st:
-            return [TextContent(type="text", text="Failed to get ST during login process.")]
-
-        session = get_api_session(st)
-
-        # 2. FIND WORKSPACE
-        target_workspace = _find_workspace(session, workspace_name)
+        # 1. FIND WORKSPACE (the shared session takes care of authentication)
+        target_workspace = await _find_workspace(workspace_name)
 
         if not target_workspace:
             return [TextContent(type="text", text=f"No workspaces found matching '{workspace_name}'.")]
@@ -105,10 +78,10 @@ async def get_workspace_forms_tool(workspace_name: str) -> list[TextContent]:
         workspace_id = target_workspace.get("id")
         workspace_display_name = target_workspace.get('name')
 
-        # 3. FETCH FORMS
-        forms_list = _fetch_forms(session, workspace_id)
+        # 2. FETCH FORMS
+        forms_list = await _fetch_forms(workspace_id)
 
-        # 4. FORMAT OUTPUT
+        # 3. FORMAT OUTPUT
         if not forms_list:
             return [TextContent(type="text", text=f"No forms found for workspace '{workspace_display_name}'.")]
 
@@ -137,4 +110,4 @@ async def get_workspace_forms_tool(workspace_name: str) -> list[TextContent]:
 
     except Exception as e:
         # Catch any unexpected errors during the process
-        return [TextContent(type="text", text=f"An error occurred during form retrieval: {str(e)}")]
\ No newline at end of file
+        return tool_error(f"An error occurred during form retrieval: {str(e)}")
\ No newline at end of file
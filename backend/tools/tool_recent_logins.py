@@ -5,12 +5,11 @@ Returns all the users that signed in to the site, how many times, and the time
 """
 from datetime import datetime, timezone
 import os
-from dotenv import load_dotenv
 from mcp.types import TextContent
-from backend.opsready import get_tgt, get_st, get_api_session
+from backend.tool_registry import tool_error
+from backend.accounts import get_account_directory
 
 
-load_dotenv()
 BASE_URL = "https://or-student-sandbox.opsready.com"
 USERNAME = os.getenv("OPSREADY_USERNAME")
 PASSWORD = os.getenv("OPSREADY_PASSWORD")
@@ -20,45 +19,25 @@ async def get_recent_logins(since_date: str) -> list[TextContent]:
     try:
         since = datetime.strptime(since_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
     except ValueError:
-        return [TextContent(
-            type="text",
-            text="Invalid date format. Use YYYY-MM-DD."
-        )]
-
-    url = f"{BASE_URL}/api/account?limit=500&offset=0&search=&with_teams=true"
+        return tool_error("Invalid date format. Use YYYY-MM-DD.")
 
     try:
-        tgt = get_tgt(USERNAME, PASSWORD)
-        if not tgt:
-            print("failed to get TGT")
-            return [TextContent(type="text", text="Failed to get TGT")]
-
-        service_url = f"{BASE_URL}/api/login"
-        st = get_st(tgt, service_url)
-        session = get_api_session(st)
-        response = session.get(url)
-        response.raise_for_status()
-        data = response.json()
+        # shared account directory, only re-downloads /api/account once its TTL is up
+        data = await get_account_directory().all()
     except Exception as e:
-        return [TextContent(
-            type="text",
-            text=f"Failed to fetch accounts: {str(e)}"
-        )]
+        return tool_error(f"Failed to fetch accounts: {str(e)}")
 
+    # last_login_ts is filled in once when the directory loads the account (see backend/timestamps.py)
+    since_ts = int(since.timestamp())
     users = []
     for user in data:
-        last_login_str = user.get("last_login")
-        if last_login_str:
-            try:
-                last_login = datetime.fromisoformat(last_login_str.replace("Z", "+00:00"))
-                if last_login >= since:
-                    users.append({
-                        # "id": user.get("id"),
-                        "name": user.get("username"),
-                        "last_login": last_login_str
-                    })
-            except (ValueError, AttributeError):
-                continue
+        last_login_ts = user.get("last_login_ts")
+        if last_login_ts is not None and last_login_ts >= since_ts:
+            users.append({
+                # "id": user.get("id"),
+                "name": user.get("username"),
+                "last_login": user.get("last_login")
+            })
 
     if not users:
         return [TextContent(
@@ -4,58 +4,32 @@ Returns the tasks in the workspace with the name of employee it's assigned to
 """
 import os
 from typing import List, Optional
-from dotenv import load_dotenv
 from mcp.types import TextContent
-from backend.opsready import get_tgt, get_st, get_api_session
+from backend.tool_registry import tool_error
+from backend.accounts import display_name
+from backend.result_pages import first_page
+from backend.task_feed import TaskStream
+from backend.workspaces import find_workspace_id
 
 
-load_dotenv()
 BASE_URL = "https://or-student-sandbox.opsready.com"
 USERNAME = os.getenv("OPSREADY_USERNAME")
 PASSWORD = os.getenv("OPSREADY_PASSWORD")
 
 async def get_task_assignee(workspace_name: str, unassigned_only: Optional[bool] = False) -> List[TextContent]:
-    all_ws_url = f"{BASE_URL}/api/workspace?limit=50&offset=0&archived=false&order=_created,desc,,last&hidden=false"
-
     try:
-        tgt = get_tgt(USERNAME, PASSWORD)
-        if not tgt:
-            print("failed to get TGT")
-            return [TextContent(type="text", text="Failed to get TGT")]
-
-        service_url = f"{BASE_URL}/api/login"
-        st = get_st(tgt, service_url)
-        session = get_api_session(st)
-
-        response = session.get(all_ws_url)
-        response.raise_for_status()
-        data = response.json()
-
-        workspace_id= None
-        for ws in data:
-            if ws.get("name", "").lower() == workspace_name.lower():
-                workspace_id = ws.get("id")
-                break
+        workspace_id = await find_workspace_id(workspace_name)
         if not workspace_id:
-            return [TextContent(type="text", text="Failed to get workspace with that name")]
-
-        tasks_url = (f"{BASE_URL}/api/task/flat?limit=100&offset=0&order=due_date,asc,false,last&order=priority,"
-                     f"asc&order=title,asc&include_references=true&priorities=EMERGENCY&priorities=PRIORITY"
-                     f"&priorities=ROUTINE&priorities=NONE&states=OPEN&workspace_id={workspace_id}")
-
-        tasks_response = session.get(tasks_url)
-        tasks_response.raise_for_status()
-        tasks = tasks_response.json()
-
-        if not tasks:
-            return [TextContent(type="text", text="Failed to get tasks")]
-
-        tasks_list = tasks.get("results", [])
-        references = tasks.get("references", {})
-        accounts = references.get("accounts", {})
-
+            return tool_error("Failed to get workspace with that name")
 
-        user_map = {acc_id: acc_data.get("name") for acc_id, acc_data in accounts.items()}
+        # every page of open tasks in the workspace, the references on each page feed the account directory
+        stream = TaskStream(path="/api/task/flat", params=[
+            ("order", "due_date,asc,false,last"), ("order", "priority,asc"), ("order", "title,asc"),
+            ("include_references", "true"),
+            ("priorities", "EMERGENCY"), ("priorities", "PRIORITY"), ("priorities", "ROUTINE"), ("priorities", "NONE"),
+            ("states", "OPEN"), ("workspace_id", workspace_id),
+        ])
+        tasks_list = await stream.collect()
 
         lines = []
         for task in tasks_list:
@@ -68,7 +42,7 @@ async def get_task_assignee(workspace_name: str, unassigned_only: Optional[bool]
                 continue
 
             if assignee:
-                assignee_name = user_map.get(assignee, "Unknown User")
+                assignee_name = await display_name(assignee)
                 lines.append(f"{title} is due {due_date} and assigned to {assignee_name}")
             else:
                 lines.append(f"{title} is due {due_date} unassigned")
@@ -78,11 +52,11 @@ async def get_task_assignee(workspace_name: str, unassigned_only: Optional[bool]
             return [TextContent(type="text", text=msg)]
 
         label = "Unassigned tasks" if unassigned_only else "All tasks"
-        output = f"**{label} in {workspace_name}:**\n" + "\n".join(lines)
+        output = first_page("get_task_assignee", lines, header=f"**{label} in {workspace_name}:**")
         return [TextContent(type="text", text=output)]
 
     except Exception as e:
-        return [TextContent(type="text", text=f"Error: {e}")]
+        return tool_error(f"Error: {e}")
 
 
 
@@ -5,41 +5,22 @@ Works the same just for trying new things
 """
 import os
 from typing import List
-from dotenv import load_dotenv
 from mcp.types import TextContent
-from backend.opsready import get_tgt, get_st, get_api_session
+from backend.tool_registry import tool_error
+from backend.form_resolver import query_form_table
+from backend.workspaces import find_workspace_id
 
 
 
-load_dotenv()
 BASE_URL = "https://or-student-sandbox.opsready.com"
 USERNAME = os.getenv("OPSREADY_USERNAME")
 PASSWORD = os.getenv("OPSREADY_PASSWORD")
 
 async def get_workspace_deficiencies(workspace_name: str) -> List[TextContent]:
-    all_ws_url = f"{BASE_URL}/api/workspace?limit=50&offset=0&archived=false&order=_created,desc,,last&hidden=false"
-
     try:
-        tgt = get_tgt(USERNAME, PASSWORD)
-        if not tgt:
-            print("failed to get TGT")
-            return [TextContent(type="text", text="Failed to get TGT")]
-
-        service_url = f"{BASE_URL}/api/login"
-        st = get_st(tgt, service_url)
-        session = get_api_session(st)
-
-        response = session.get(all_ws_url)
-        response.raise_for_status()
-        data = response.json()
-
-        workspace_id= None
-        for ws in data:
-            if ws.get("name", "").lower() == workspace_name.lower():
-                workspace_id = ws.get("id")
-                break
+        workspace_id = await find_workspace_id(workspace_name)
         if not workspace_id:
-            return [TextContent(type="text", text="Failed to get workspace with that name")]
+            return tool_error("Failed to get workspace with that name")
 
         #forms_url = (f"{BASE_URL}api/workspace/{workspace_id}/form?offset=0&limit=500&name=")
 
@@ -50,18 +31,6 @@ async def get_workspace_deficiencies(workspace_name: str) -> List[TextContent]:
         #if not forms:
            # return [TextContent(type="text", text="Failed to get forms with that name")]
         form_access_id = "7f08e35a-9f0b-45ff-a554-7caff337f664"  # defecincies form id
-        access_url = f"{BASE_URL}/api/form/access/{form_access_id}"
-        access_data = session.get(access_url).json()
-        template_id = access_data.get("template_id")
-
-        # Get form template
-        template_data = session.get(f"{BASE_URL}/api/form/template/{template_id}").json()
-        flex_id = template_data.get("flex_definition_id")
-
-        table = f"{BASE_URL}/api/table/{flex_id}"
-        table_response = session.get(table)
-        table_data = table_response.json()
-        table_url = f"{BASE_URL}/api/table/{flex_id}/query"
 
         query_body = {
             "filter": {
@@ -74,7 +43,7 @@ async def get_workspace_deficiencies(workspace_name: str) -> List[TextContent]:
             "offset": 0
         }
 
-        results = session.post(table_url, json=query_body)
+        results = await query_form_table(form_access_id, query_body)
 
         lines = []
         for i, record in enumerate(results, start=1):
@@ -92,4 +61,4 @@ async def get_workspace_deficiencies(workspace_name: str) -> List[TextContent]:
 
 
     except Exception as e:
-        return [TextContent(type="text", text=f"Error: {e}")]
\ No newline at end of file
+        return tool_error(f"Error: {e}")
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+workspaces.py is the shared workspace directory for all tools.
+
+Tools used to download /api/workspace?limit=50 on every call and loop over it looking for a name, which cost a round trip
+per tool call and silently missed every workspace past the first 50. The directory pages through all workspaces once,
+keeps a normalized name -> id index and an id -> record index, and refreshes them when they are older than WORKSPACE_TTL
+or when a lookup misses (at most once every MISS_REFRESH_INTERVAL seconds, so a typo does not re-download everything).
+
+The methods:
+
+find_workspace(name, partial=False):
+    returns the workspace record for a name (case and whitespace insensitive). partial=True also accepts a workspace whose
+    name contains the given text, which is how the forms tool has always matched.
+
+find_workspace_id(name):
+    same as above but only returns the id.
+
+get_workspace_directory():
+    the process wide WorkspaceDirectory, for tools that need get(id) or all().
+"""
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional
+
+from backend.opsready import BASE_URL, api_get
+
+WORKSPACE_TTL = int(os.getenv("OPSREADY_WORKSPACE_TTL", 15 * 60))
+MISS_REFRESH_INTERVAL = int(os.getenv("OPSREADY_WORKSPACE_MISS_REFRESH", 30))
+PAGE_SIZE = 50
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(str(name).split()).casefold()
+
+
+class WorkspaceDirectory:
+    """Name and id index over every (non archived, non hidden) workspace the account can see."""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._by_id: Dict[str, Dict] = {}
+        self._by_name: Dict[str, str] = {}
+        self._loaded_at = 0.0
+
+    async def _fetch_all(self) -> List[Dict]:
+        workspaces: List[Dict] = []
+        offset = 0
+        while True:
+            url = (f"{BASE_URL}/api/workspace?limit={PAGE_SIZE}&offset={offset}"
+                   "&archived=false&order=_created,desc,,last&hidden=false")
+            response = await api_get(url)
+            response.raise_for_status()
+            page = response.json()
+            if isinstance(page, dict):
+                page = page.get("results", [])
+            workspaces.extend(page)
+            if len(page) < PAGE_SIZE:
+                return workspaces
+            offset += PAGE_SIZE
+
+    async def refresh(self) -> None:
+        """Re-download every workspace page and rebuild both indexes."""
+        async with self._lock:
+            await self._refresh_locked()
+
+    async def _refresh_locked(self) -> None:
+        workspaces = await self._fetch_all()
+        by_id: Dict[str, Dict] = {}
+        by_name: Dict[str, str] = {}
+        for ws in workspaces:
+            ws_id = ws.get("id")
+            if not ws_id:
+                continue
+            by_id[ws_id] = ws
+            if ws.get("name"):
+                # keep the first (newest) workspace when two share a name, like the old linear scan did
+                by_name.setdefault(normalize_name(ws["name"]), ws_id)
+        self._by_id = by_id
+        self._by_name = by_name
+        self._loaded_at = time.monotonic()
+
+    async def _ensure_loaded(self) -> None:
+        if time.monotonic() - self._loaded_at < WORKSPACE_TTL:
+            return
+        async with self._lock:
+            # another caller may have refreshed while we waited
+            if time.monotonic() - self._loaded_at >= WORKSPACE_TTL:
+                await self._refresh_locked()
+
+    async def _refresh_on_miss(self) -> bool:
+        if time.monotonic() - self._loaded_at < MISS_REFRESH_INTERVAL:
+            return False
+        async with self._lock:
+            if time.monotonic() - self._loaded_at >= MISS_REFRESH_INTERVAL:
+                await self._refresh_locked()
+        return True
+
+    def _lookup(self, name: str, partial: bool) -> Optional[Dict]:
+        key = normalize_name(name)
+        ws_id = self._by_name.get(key)
+        if ws_id:
+            return self._by_id.get(ws_id)
+        if partial and key:
+            for ws_key, ws_id in self._by_name.items():
+                if key in ws_key:
+                    return self._by_id.get(ws_id)
+        return None
+
+    async def find(self, name: str, partial: bool = False) -> Optional[Dict]:
+        if not name or not name.strip():
+            return None
+        await self._ensure_loaded()
+        workspace = self._lookup(name, partial)
+        if workspace is None and await self._refresh_on_miss():
+            workspace = self._lookup(name, partial)
+        return workspace
+
+    async def get(self, workspace_id: str) -> Optional[Dict]:
+        await self._ensure_loaded()
+        workspace = self._by_id.get(workspace_id)
+        if workspace is None and await self._refresh_on_miss():
+            workspace = self._by_id.get(workspace_id)
+        return workspace
+
+    async def all(self) -> List[Dict]:
+        await self._ensure_loaded()
+        return list(self._by_id.values())
+
+    def invalidate(self) -> None:
+        self._loaded_at = 0.0
+
+
+_directory = WorkspaceDirectory()
+
+
+def get_workspace_directory() -> WorkspaceDirectory:
+    return _directory
+
+
+async def find_workspace(name: str, partial: bool = False) -> Optional[Dict]:
+    return await _directory.find(name, partial)
+
+
+async def find_workspace_id(name: str) -> Optional[str]:
+    workspace = await _directory.find(name)
+    return workspace.get("id") if workspace else None
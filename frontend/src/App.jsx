@@ -1,12 +1,15 @@
 import React, { useState, useRef, useEffect } from 'react';
 import './App.css';
 
+const API_URL = 'https://opsready-chatbot-production.up.railway.app';
+
 function App() {
   const [messages, setMessages] = useState([]);
   const [inputValue, setInputValue] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [isRecording, setIsRecording] = useState(false);
-  const [conversationHistory, setConversationHistory] = useState([]);
+  // The server keeps the conversation, the browser only sends this id with each message
+  const [conversationId, setConversationId] = useState(() => crypto.randomUUID());
   const messagesEndRef = useRef(null);
   const recognitionRef = useRef(null);
 
@@ -59,25 +62,64 @@ function App() {
     }
   };
 
+  // Update the assistant message that is currently streaming (always the last one)
+  const updateLastMessage = (update) => {
+    setMessages(prev => {
+      const next = [...prev];
+      next[next.length - 1] = update(next[next.length - 1]);
+      return next;
+    });
+  };
+
+  // Apply one server-sent event from /api/chat/stream
+  const handleStreamEvent = (event, data) => {
+    if (event === 'text') {
+      updateLastMessage(msg => ({ ...msg, content: msg.content + data.text }));
+    } else if (event === 'tool_start') {
+      // text before a tool call is the model thinking out loud, the answer starts after the tools
+      updateLastMessage(msg => ({
+        ...msg,
+        content: '',
+        tools: [...msg.tools, { id: data.id, name: data.name, done: false }]
+      }));
+    } else if (event === 'tool_end') {
+      updateLastMessage(msg => ({
+        ...msg,
+        tools: msg.tools.map(tool => tool.id === data.id
+          ? { ...tool, done: true, seconds: data.seconds, isError: data.is_error }
+          : tool)
+      }));
+    } else if (event === 'done') {
+      updateLastMessage(msg => ({ ...msg, content: data.response }));
+      setConversationId(data.conversation_id);
+    } else if (event === 'error') {
+      throw new Error(data.detail);
+    }
+  };
+
   const sendMessage = async () => {
     if (!inputValue.trim() || isLoading) return;
 
     const userMessage = inputValue.trim();
     setInputValue('');
 
-    // Add user message to UI
-    setMessages(prev => [...prev, { role: 'user', content: userMessage }]);
+    // Add user message and an empty assistant message that fills in as the answer streams
+    setMessages(prev => [
+      ...prev,
+      { role: 'user', content: userMessage },
+      { role: 'assistant', content: '', tools: [] }
+    ]);
     setIsLoading(true);
 
     try {
-      const response = await fetch('https://opsready-chatbot-production.up.railway.app/api/chat', {
+      const response = await fetch(`${API_URL}/api/chat/stream`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
           message: userMessage,
-          conversation_history: conversationHistory
+          conversation_id: conversationId
         })
       });
 
@@ -85,20 +127,34 @@ function App() {
         throw new Error(`HTTP error! status: ${response.status}`);
       }
 
-      const data = await response.json();
-
-      // Add AI response to UI
-      setMessages(prev => [...prev, { role: 'assistant', content: data.response }]);
-      
-      // Update conversation history for context
-      setConversationHistory(data.conversation_history);
+      // Server-sent events are separated by a blank line, each has an "event:" and a "data:" line
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const raw = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          let event = 'message';
+          let data = '';
+          for (const line of raw.split('\n')) {
+            if (line.startsWith('event: ')) event = line.slice(7);
+            else if (line.startsWith('data: ')) data += line.slice(6);
+          }
+          if (data) handleStreamEvent(event, JSON.parse(data));
+        }
+      }
 
     } catch (error) {
       console.error('Error:', error);
-      setMessages(prev => [...prev, { 
-        role: 'assistant', 
-        content: `Error: ${error.message}. Make sure the backend server is running on http://localhost:8000` 
-      }]);
+      updateLastMessage(msg => ({
+        ...msg,
+        content: `Error: ${error.message}. Make sure the backend server is running on http://localhost:8000`
+      }));
     } finally {
       setIsLoading(false);
     }
@@ -113,7 +169,7 @@ function App() {
 
   const clearChat = () => {
     setMessages([]);
-    setConversationHistory([]);
+    setConversationId(crypto.randomUUID());
   };
 
   return (
@@ -148,25 +204,38 @@ function App() {
               <p>This is a demo with fake data. Mechanisms are the same</p>
             </div>
           ) : (
-            messages.map((msg, index) => (
+            messages.map((msg, index) => (!msg.content && !msg.tools?.length) ? null : (
               <div key={index} className={`message ${msg.role}`}>
                 <div className="message-avatar">
                   {msg.role === 'user' ? '👤' : '🤖'}
                 </div>
                 <div className="message-content">
-                  <div className="message-text">
-                    {msg.content.split('\n').map((line, i) => (
-                      <React.Fragment key={i}>
-                        {line}
-                        {i < msg.content.split('\n').length - 1 && <br />}
-                      </React.Fragment>
-                    ))}
-                  </div>
+                  {msg.tools && msg.tools.length > 0 && (
+                    <div className="tool-status">
+                      {msg.tools.map(tool => (
+                        <div key={tool.id} className={`tool-step ${tool.isError ? 'error' : ''}`}>
+                          {tool.done
+                            ? `${tool.isError ? '⚠️' : '✓'} ${tool.name} (${tool.seconds}s)`
+                            : `⚙️ ${tool.name}…`}
+                        </div>
+                      ))}
+                    </div>
+                  )}
+                  {msg.content && (
+                    <div className="message-text">
+                      {msg.content.split('\n').map((line, i) => (
+                        <React.Fragment key={i}>
+                          {line}
+                          {i < msg.content.split('\n').length - 1 && <br />}
+                        </React.Fragment>
+                      ))}
+                    </div>
+                  )}
                 </div>
               </div>
             ))
           )}
-          {isLoading && (
+          {isLoading && messages[messages.length - 1]?.content === '' && (
             <div className="message assistant">
               <div className="message-avatar">🤖</div>
               <div className="message-content">